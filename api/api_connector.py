@@ -1,16 +1,65 @@
+import functools
+import hashlib
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Optional, Any, List
 import hyperliquid
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import eth_account
 from eth_account.signers.local import LocalAccount
 from hyperliquid.exchange import Exchange
 from hyperliquid.info import Info
-from api.constants import MAINNET_API_URL, TESTNET_API_URL
+from api.constants import (
+    MAINNET_API_URL, TESTNET_API_URL,
+    BALANCES_CACHE_TTL, ALL_MIDS_CACHE_TTL, META_CACHE_TTL, ORDER_BOOK_CACHE_TTL, UNKNOWN_SYMBOL_CACHE_TTL,
+    USER_STATE_STREAM_MAX_AGE
+)
+
+# Perp balance reported when the exchange can't be reached
+_EMPTY_PERP = {
+    "account_value": 0.0,
+    "margin_used": 0.0,
+    "position_value": 0.0
+}
+
+# Signers already derived from a secret key, keyed by a hash of the key
+_ACCOUNT_CACHE: Dict[str, LocalAccount] = {}
+_ACCOUNT_CACHE_SIZE = 4
+
+def _copy_balances(balances: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a balances dict deep enough that callers can mutate it without touching the cache"""
+    return {
+        "spot": [dict(balance) for balance in balances["spot"]],
+        "perp": dict(balances["perp"])
+    }
+
+def _derive_account(secret_key: str) -> LocalAccount:
+    """Derive the signer for a secret key, reusing it if the key was seen before"""
+    key_hash = hashlib.sha256(secret_key.encode()).hexdigest()
+    account = _ACCOUNT_CACHE.get(key_hash)
+    if account is None:
+        account = eth_account.Account.from_key(secret_key)
+        if len(_ACCOUNT_CACHE) >= _ACCOUNT_CACHE_SIZE:
+            _ACCOUNT_CACHE.pop(next(iter(_ACCOUNT_CACHE)))
+        _ACCOUNT_CACHE[key_hash] = account
+    return account
 
 class ApiConnector:
     """Handles connections to trading APIs and exchanges"""
     
+    __slots__ = (
+        "logger", "wallet", "wallet_address", "exchange", "info",
+        "_is_testnet", "_network_str", "_client_key",
+        "_balances_cache", "_all_mids_cache", "_meta_cache", "_order_book_cache", "_unknown_symbols",
+        "_user_state_mirror", "_user_state_mirror_ts", "_stream_subscriptions",
+        "_executor", "_inflight", "_inflight_lock", "_session",
+    )
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.wallet: Optional[LocalAccount] = None
@@ -18,7 +67,105 @@ class ApiConnector:
         self.exchange: Optional[Exchange] = None
         self.info: Optional[Info] = None
         self._is_testnet: bool = False  # Track which network we're connected to
+        self._network_str: str = "mainnet"  # Network name, fixed at connect time
+        self._client_key: Optional[tuple] = None  # (api_url, wallet_address, signer) of the live clients
+        self._balances_cache: Dict[tuple, tuple] = {}  # (wallet, testnet) -> (timestamp, balances)
+        self._all_mids_cache: tuple = (float("-inf"), {})  # (timestamp, all_mids)
+        self._meta_cache: tuple = (float("-inf"), {}, {})  # (timestamp, meta, name -> asset info)
+        self._order_book_cache: Dict[str, tuple] = {}  # symbol -> (timestamp, l2 snapshot)
+        self._unknown_symbols: Dict[str, float] = {}  # symbol -> time it was last found to have no price
+        # Local copy of user_state kept current by the webData2 WebSocket stream
+        self._user_state_mirror: Optional[Dict[str, Any]] = None
+        self._user_state_mirror_ts: float = float("-inf")
+        # (subscription, id) of the streams registered on the current Info, unsubscribed when it is replaced
+        self._stream_subscriptions: List[tuple] = []
+        # Worker pool used to issue independent Info requests concurrently
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-connector")
+        # Identical requests already on the wire, so concurrent callers can share one response
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # One keep-alive pool shared by every Exchange/Info we create, across reconnects
+        self._session = self._create_session()
+        
+    def _create_session(self) -> requests.Session:
+        """Create the pooled HTTP session shared by the exchange and info clients"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=50,
+            pool_maxsize=50,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        return session
+    
+    def _attach_session(self) -> None:
+        """Point the current exchange and info clients at the shared session"""
+        if self.exchange is not None:
+            self.exchange.session = self._session
+            # Exchange keeps its own Info for market order pricing (all_mids) and market_close
+            # (user_state); without this those calls open connections outside the pool
+            exchange_info = getattr(self.exchange, "info", None)
+            if exchange_info is not None:
+                exchange_info.session = self._session
+        if self.info is not None:
+            self.info.session = self._session
+    
+    def _release_info(self, info: Optional[Info]) -> None:
+        """
+        Unsubscribe our streams from an Info that is being dropped and stop its WebSocket thread
         
+        Args:
+            info: The Info client to release
+        """
+        if info is None or getattr(info, "ws_manager", None) is None:
+            return
+        for subscription, subscription_id in self._stream_subscriptions:
+            try:
+                info.unsubscribe(subscription, subscription_id)
+            except Exception as e:
+                self.logger.debug("Could not unsubscribe %s: %s", subscription["type"], e)
+        self._stream_subscriptions = []
+        try:
+            info.disconnect_websocket()
+        except Exception as e:
+            self.logger.warning("Error closing WebSocket: %s", e)
+        
+    def _call_once(self, method, *args):
+        """
+        Call an Info method, sharing the result with any identical call already in flight
+        
+        Args:
+            method: Bound Info method to call
+            *args: Positional arguments for the method
+            
+        Returns:
+            The method's result
+        """
+        # Calls on different Info clients (e.g. before and after a reconnect) are never shared
+        key = (id(getattr(method, "__self__", None)), method.__name__) + args
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not is_owner:
+            return future.result()
+        
+        try:
+            result = method(*args)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
     def connect_testnet(self) -> bool:
         """
         Connect to Hyperliquid testnet
@@ -28,19 +175,29 @@ class ApiConnector:
         """
         try:
             self._is_testnet = True
+            self._network_str = "testnet"
             api_url = TESTNET_API_URL
             
-            # Initialize exchange and info for testnet
+            # Initialize exchange and info for testnet, dropping the previous network's streams
+            self._release_info(self.info)
+            self.info = None
+            self._user_state_mirror = None
             self.exchange = Exchange(
                 None,  # No wallet needed for testnet
                 api_url
             )
             self.info = Info(api_url)
+            self._attach_session()
+            self._all_mids_cache = (float("-inf"), {})
+            self._meta_cache = (float("-inf"), {}, {})
+            self._order_book_cache = {}
+            self._unknown_symbols = {}
+            self._client_key = None
             
             self.logger.info("Successfully connected to Hyperliquid testnet")
             return True
         except Exception as e:
-            self.logger.error(f"Error connecting to Hyperliquid testnet: {str(e)}")
+            self.logger.error("Error connecting to Hyperliquid testnet: %s", e)
             return False
 
     def connect(self, credentials: Dict[str, str]) -> bool:
@@ -55,13 +212,14 @@ class ApiConnector:
         """
         try:
             self._is_testnet = False
+            self._network_str = "mainnet"
             return self.connect_hyperliquid(
                 wallet_address=credentials["wallet_address"],
                 secret_key=credentials["secret_key"],
                 use_testnet=False
             )
         except Exception as e:
-            self.logger.error(f"Error connecting to Hyperliquid mainnet: {str(e)}")
+            self.logger.error("Error connecting to Hyperliquid mainnet: %s", e)
             return False
 
     def connect_hyperliquid(self, wallet_address: str, secret_key: str, 
@@ -80,28 +238,121 @@ class ApiConnector:
         try:
             self.wallet_address = wallet_address
             self._is_testnet = use_testnet  # Store the network type
+            self._network_str = "testnet" if use_testnet else "mainnet"
             api_url = TESTNET_API_URL if use_testnet else MAINNET_API_URL
             
-            # Initialize wallet
-            self.wallet = eth_account.Account.from_key(secret_key)
+            # Initialize wallet (signer derivation is cached per key)
+            self.wallet = _derive_account(secret_key)
             
-            # Initialize exchange and info
-            self.exchange = Exchange(
-                self.wallet,
-                api_url,
-                account_address=self.wallet_address
-            )
-            self.info = Info(api_url)
+            # Initialize exchange and info, keeping the current ones if nothing changed
+            client_key = (api_url, self.wallet_address, self.wallet.address)
+            new_clients = client_key != self._client_key or self.exchange is None or self.info is None
+            if new_clients:
+                # Stop the old Info's streams first, or they keep pushing the previous wallet's state
+                self._release_info(self.info)
+                self.info = None
+                self._client_key = None
+                self._user_state_mirror = None
+                self.exchange = Exchange(
+                    self.wallet,
+                    api_url,
+                    account_address=self.wallet_address
+                )
+                self.info = Info(api_url)
+                self._attach_session()
+                self._all_mids_cache = (float("-inf"), {})
+                self._meta_cache = (float("-inf"), {}, {})
+                self._order_book_cache = {}
+                self._unknown_symbols = {}
             
             # Test connection by getting balances
-            user_state = self.info.user_state(self.wallet_address)
+            try:
+                user_state = self.info.user_state(self.wallet_address)
+            except Exception:
+                # Don't leave a WebSocket thread running for a connection that never came up
+                if new_clients:
+                    self._release_info(self.info)
+                raise
             
-            self.logger.info(f"Successfully connected to Hyperliquid {'(testnet)' if use_testnet else ''}")
+            # Keep user_state and mid prices current over WebSocket so reads don't need a round trip
+            if new_clients:
+                self._client_key = client_key
+                self.start_user_state_stream()
+                self.start_all_mids_stream()
+            
+            self.logger.info("Successfully connected to Hyperliquid %s", '(testnet)' if use_testnet else '')
             return True
         except Exception as e:
-            self.logger.error(f"Error connecting to Hyperliquid: {str(e)}")
+            self.logger.error("Error connecting to Hyperliquid: %s", e)
             return False
     
+    def start_user_state_stream(self) -> bool:
+        """
+        Subscribe to the webData2 stream and mirror the wallet's user_state locally
+        
+        Returns:
+            True if the subscription was registered, False otherwise
+        """
+        if not self.info or not self.wallet_address:
+            return False
+        
+        try:
+            subscription = {"type": "webData2", "user": self.wallet_address}
+            subscription_id = self.info.subscribe(subscription, functools.partial(self._on_web_data, source=self.info))
+            self._stream_subscriptions.append((subscription, subscription_id))
+            return True
+        except Exception as e:
+            self.logger.warning("Could not start user state stream, falling back to REST: %s", e)
+            return False
+    
+    def _on_web_data(self, message: Dict[str, Any], source: Optional[Info] = None) -> None:
+        """Update the user_state mirror from a webData2 message sent through the current Info"""
+        if source is not self.info:
+            return
+        data = message.get("data") or {}
+        user_state = data.get("clearinghouseState")
+        if isinstance(user_state, dict):
+            self._user_state_mirror = user_state
+            self._user_state_mirror_ts = time.monotonic()
+    
+    def start_all_mids_stream(self) -> bool:
+        """
+        Subscribe to the allMids stream and refresh the shared mid price cache on every push
+        
+        While pushes keep arriving the cache never goes stale, so get_mid_price and
+        get_market_data stop polling all_mids over REST.
+        
+        Returns:
+            True if the subscription was registered, False otherwise
+        """
+        if not self.info:
+            return False
+        
+        try:
+            subscription = {"type": "allMids"}
+            subscription_id = self.info.subscribe(subscription, functools.partial(self._on_all_mids, source=self.info))
+            self._stream_subscriptions.append((subscription, subscription_id))
+            return True
+        except Exception as e:
+            self.logger.warning("Could not start mid price stream, falling back to REST: %s", e)
+            return False
+    
+    def _on_all_mids(self, message: Dict[str, Any], source: Optional[Info] = None) -> None:
+        """Replace the all_mids cache with an allMids push sent through the current Info"""
+        # A push from a replaced Info carries the other network's mids and would keep them looking fresh
+        if source is not self.info:
+            return
+        mids = (message.get("data") or {}).get("mids")
+        if isinstance(mids, dict):
+            self._all_mids_cache = (time.monotonic(), mids)
+    
+    def _get_user_state(self) -> Dict[str, Any]:
+        """Return user_state from the stream mirror if it is fresh, otherwise over REST"""
+        mirror = self._user_state_mirror
+        if mirror is not None and time.monotonic() - self._user_state_mirror_ts < USER_STATE_STREAM_MAX_AGE:
+            return mirror
+        return self._call_once(self.info.user_state, self.wallet_address)
+    
     def is_testnet(self) -> bool:
         """
         Check if currently connected to testnet
@@ -120,42 +371,65 @@ class ApiConnector:
         """
         return self.exchange is not None and self.info is not None
     
-    def get_balances(self) -> Dict[str, Any]:
-        """Get all balances (spot and perpetual)"""
+    def close(self) -> None:
+        """Stop the WebSocket streams and release the worker pool and pooled HTTP connections"""
+        self._release_info(self.info)
+        self._executor.shutdown(wait=False)
+        self._session.close()
+    
+    def invalidate_balances(self) -> None:
+        """Drop cached balances so the next lookup hits the exchange"""
+        self._balances_cache.clear()
+    
+    def get_balances(self, use_cache: bool = False) -> Dict[str, Any]:
+        """
+        Get all balances (spot and perpetual)
+        
+        Args:
+            use_cache: Return balances fetched within the last BALANCES_CACHE_TTL
+                seconds instead of querying the exchange again
+            
+        Returns:
+            Dict with spot and perp balances
+        """
         if not self.info or not self.wallet_address:
             self.logger.error("Not connected to exchange")
-            return {
-                "spot": [],
-                "perp": {
-                    "account_value": 0.0,
-                    "margin_used": 0.0,
-                    "position_value": 0.0
-                }
-            }
+            return {"spot": [], "perp": dict(_EMPTY_PERP)}
+        
+        cache_key = (self.wallet_address, self._is_testnet)
+        if use_cache:
+            cached = self._balances_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < BALANCES_CACHE_TTL:
+                return _copy_balances(cached[1])
         
         try:
-            # Get spot balances
+            # Fire both requests at once so the total wait is the slower of the two
+            spot_future = self._executor.submit(self._call_once, self.info.spot_user_state, self.wallet_address)
+            perp_future = self._executor.submit(self._get_user_state)
+            
+            # Get spot balances; only a result where both fetches succeeded is cached
+            fetch_failed = False
             spot_balances = []
             try:
-                spot_state = self.info.spot_user_state(self.wallet_address)
-                for balance in spot_state.get("balances", []):
-                    spot_balances.append({
+                spot_state = spot_future.result()
+                append = spot_balances.append
+                for balance in spot_state.get("balances", ()):
+                    available = float(balance.get("available", 0))
+                    total = float(balance.get("total", 0))
+                    append({
                         "asset": balance.get("coin", ""),
-                        "available": float(balance.get("available", 0)),
-                        "total": float(balance.get("total", 0)),
-                        "in_orders": float(balance.get("total", 0)) - float(balance.get("available", 0))
+                        "available": available,
+                        "total": total,
+                        "in_orders": total - available
                     })
             except Exception as e:
-                self.logger.error(f"Error fetching spot balances: {str(e)}")
+                fetch_failed = True
+                self.logger.error("Error fetching spot balances: %s", e)
             
             # Get perpetual balances
-            perp_balances = {
-                "account_value": 0.0,
-                "margin_used": 0.0,
-                "position_value": 0.0
-            }
+            perp_balances = dict(_EMPTY_PERP)
             try:
-                perp_state = self.info.user_state(self.wallet_address)
+                perp_state = perp_future.result()
                 if perp_state and isinstance(perp_state, dict):
                     margin_summary = perp_state.get("marginSummary", {})
                     if margin_summary and isinstance(margin_summary, dict):
@@ -165,26 +439,23 @@ class ApiConnector:
                             "position_value": float(margin_summary.get("totalNtlPos", 0))
                         }
             except Exception as e:
-                self.logger.error(f"Error fetching perpetual balances: {str(e)}")
+                fetch_failed = True
+                self.logger.error("Error fetching perpetual balances: %s", e)
             
             # Log the response for debugging
-            self.logger.debug(f"Spot balances: {spot_balances}")
-            self.logger.debug(f"Perp balances: {perp_balances}")
+            self.logger.debug("Spot balances: %s", spot_balances)
+            self.logger.debug("Perp balances: %s", perp_balances)
             
-            return {
+            balances = {
                 "spot": spot_balances,
                 "perp": perp_balances
             }
+            if not fetch_failed:
+                self._balances_cache[cache_key] = (time.monotonic(), _copy_balances(balances))
+            return balances
         except Exception as e:
-            self.logger.error(f"Error in get_balances: {str(e)}")
-            return {
-                "spot": [],
-                "perp": {
-                    "account_value": 0.0,
-                    "margin_used": 0.0,
-                    "position_value": 0.0
-                }
-            }
+            self.logger.error("Error in get_balances: %s", e)
+            return {"spot": [], "perp": dict(_EMPTY_PERP)}
     
     def get_positions(self) -> List[Dict[str, Any]]:
         """Get all open positions"""
@@ -193,92 +464,225 @@ class ApiConnector:
             return []
         
         try:
-            perp_state = self.info.user_state(self.wallet_address)
+            perp_state = self._get_user_state()
             positions = []
             
-            for asset_position in perp_state.get("assetPositions", []):
-                position = asset_position.get("position", {})
-                if float(position.get("szi", 0)) != 0:
-                    positions.append({
-                        "symbol": position.get("coin", ""),
-                        "size": float(position.get("szi", 0)),
-                        "entry_price": float(position.get("entryPx", 0)),
-                        "mark_price": float(position.get("markPx", 0)),
-                        "liquidation_price": float(position.get("liquidationPx", 0) or 0),
-                        "unrealized_pnl": float(position.get("unrealizedPnl", 0)),
-                        "margin_used": float(position.get("marginUsed", 0))
-                    })
+            append = positions.append
+            for asset_position in perp_state.get("assetPositions", ()):
+                position = asset_position.get("position")
+                if not position:
+                    continue
+                # Skip flat positions before converting anything else
+                size = float(position.get("szi") or 0)
+                if size == 0:
+                    continue
+                append({
+                    "symbol": position.get("coin", ""),
+                    "size": size,
+                    "entry_price": float(position.get("entryPx") or 0),
+                    "mark_price": float(position.get("markPx") or 0),
+                    "liquidation_price": float(position.get("liquidationPx") or 0),
+                    "unrealized_pnl": float(position.get("unrealizedPnl") or 0),
+                    "margin_used": float(position.get("marginUsed") or 0)
+                })
             
             return positions
         except Exception as e:
-            self.logger.error(f"Error fetching positions: {str(e)}")
+            self.logger.error("Error fetching positions: %s", e)
             return []
     
-    def get_market_data(self, symbol: str) -> Dict[str, Any]:
+    def _get_all_mids(self) -> Dict[str, str]:
+        """Return all mid prices, refreshing from the exchange at most every ALL_MIDS_CACHE_TTL seconds"""
+        cached_at, all_mids = self._all_mids_cache
+        if time.monotonic() - cached_at >= ALL_MIDS_CACHE_TTL:
+            info = self.info
+            all_mids = self._call_once(info.all_mids)
+            # Don't let a response from before a reconnect fill the new connection's cache
+            if info is self.info:
+                self._all_mids_cache = (time.monotonic(), all_mids)
+        return all_mids
+    
+    def get_asset_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a symbol's entry in the perp asset universe
+        
+        The universe is fetched at most every META_CACHE_TTL seconds and indexed by name.
+        
+        Args:
+            symbol: Asset name as listed in meta()["universe"]
+            
+        Returns:
+            The asset's metadata dict, or None if the symbol isn't listed
+        """
+        cached_at, meta, name_index = self._meta_cache
+        if time.monotonic() - cached_at >= META_CACHE_TTL:
+            info = self.info
+            meta = self._call_once(info.meta)
+            name_index = {asset.get("name"): asset for asset in meta.get("universe", ())}
+            if info is self.info:
+                self._meta_cache = (time.monotonic(), meta, name_index)
+        return name_index.get(symbol)
+    
+    def get_order_book(self, symbol: str) -> Dict[str, Any]:
+        """
+        Get a symbol's L2 book, reusing a snapshot fetched within ORDER_BOOK_CACHE_TTL seconds
+        
+        Concurrent callers for the same symbol share a single request.
+        
+        Args:
+            symbol: Trading pair symbol
+            
+        Returns:
+            The l2_snapshot response
+        """
+        cached = self._order_book_cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < ORDER_BOOK_CACHE_TTL:
+            return cached[1]
+        info = self.info
+        order_book = self._call_once(info.l2_snapshot, symbol)
+        if info is self.info:
+            self._order_book_cache[symbol] = (time.monotonic(), order_book)
+        return order_book
+    
+    def get_mid_price(self, symbol: str) -> Optional[float]:
+        """
+        Get the current mid price for a symbol from the shared all_mids snapshot
+        
+        Args:
+            symbol: Trading pair symbol
+            
+        Returns:
+            Mid price, or None if the exchange doesn't quote the symbol
+        """
+        mid_price = self._get_all_mids().get(symbol)
+        return float(mid_price) if mid_price is not None else None
+    
+    def _apply_order_book(self, symbol: str, market_data: Dict[str, Any], order_book: Dict[str, Any]) -> None:
+        """Fill best_bid/best_ask (and mid_price if still missing) from an L2 snapshot"""
+        if order_book and "levels" in order_book and len(order_book["levels"]) >= 2:
+            bid_levels = order_book["levels"][0]
+            ask_levels = order_book["levels"][1]
+            
+            if bid_levels and len(bid_levels) > 0:
+                market_data["best_bid"] = float(bid_levels[0]["px"])
+            
+            if ask_levels and len(ask_levels) > 0:
+                market_data["best_ask"] = float(ask_levels[0]["px"])
+            
+            # Calculate mid price if all_mids didn't have one and we have both bid and ask
+            if "mid_price" not in market_data and "best_bid" in market_data and "best_ask" in market_data:
+                market_data["mid_price"] = (market_data["best_bid"] + market_data["best_ask"]) / 2
+                self.logger.info("Got price for %s from order book: %s", symbol, market_data['mid_price'])
+        
+        market_data["order_book"] = order_book
+    
+    def get_market_data_batch(self, symbols: List[str], include_order_book: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Get market data for several symbols from a single all_mids snapshot
+        
+        Args:
+            symbols: Trading pair symbols
+            include_order_book: Also fetch each symbol's L2 book (requests run concurrently)
+            
+        Returns:
+            Dict mapping each symbol to its market data, or to {"error": ...} if no price was found
+        """
+        if not self.info:
+            self.logger.error("Not connected to exchange when getting batch market data")
+            return {}
+        
+        # Start the book requests first so they overlap with the all_mids lookup
+        book_futures = {}
+        if include_order_book:
+            for symbol in symbols:
+                book_futures[symbol] = self._executor.submit(self.get_order_book, symbol)
+        
+        try:
+            all_mids = self._get_all_mids()
+        except Exception as e:
+            self.logger.warning("Error getting all_mids for batch: %s", e)
+            all_mids = {}
+        
+        results = {}
+        for symbol in symbols:
+            market_data = {}
+            mid_price = all_mids.get(symbol)
+            if mid_price is not None:
+                market_data["mid_price"] = float(mid_price)
+            
+            if symbol in book_futures:
+                try:
+                    self._apply_order_book(symbol, market_data, book_futures[symbol].result())
+                except Exception as e:
+                    self.logger.warning("Error getting order book for %s: %s", symbol, e)
+            
+            if "mid_price" not in market_data:
+                market_data = {"error": f"Could not determine price for {symbol}"}
+            results[symbol] = market_data
+        
+        return results
+    
+    def get_market_data(self, symbol: str, include_order_book: bool = False) -> Dict[str, Any]:
         """
         Get market data for a specific symbol with robust error handling
         
         Args:
             symbol: Trading pair symbol
+            include_order_book: Also fetch the L2 book (adds best_bid, best_ask and order_book)
             
         Returns:
             Dict with market data including mid_price, best_bid, best_ask
         """
         if not self.info:
-            self.logger.error(f"Not connected to exchange when getting market data for {symbol}")
+            self.logger.error("Not connected to exchange when getting market data for %s", symbol)
             return {}
         
+        # Don't walk the whole fallback chain again for a symbol that just failed it (e.g. a typo)
+        failed_at = self._unknown_symbols.get(symbol)
+        if failed_at is not None:
+            if time.monotonic() - failed_at < UNKNOWN_SYMBOL_CACHE_TTL:
+                return {"error": f"Could not determine price for {symbol}"}
+            self._unknown_symbols.pop(symbol, None)
+        
         try:
             # Try multiple methods to get price data for maximum reliability
             market_data = {}
+            # A lookup that raised says nothing about the symbol, so the miss isn't remembered
+            lookup_failed = False
             
-            # Method 1: Get order book
+            # Fetch the order book in the background while we look up the mid
+            if include_order_book:
+                order_book_future = self._executor.submit(self.get_order_book, symbol)
+            
+            # Method 1: Cached all_mids snapshot
             try:
-                order_book = self.info.l2_snapshot(symbol)
-                
-                if order_book and "levels" in order_book and len(order_book["levels"]) >= 2:
-                    bid_levels = order_book["levels"][0]
-                    ask_levels = order_book["levels"][1]
-                    
-                    if bid_levels and len(bid_levels) > 0:
-                        market_data["best_bid"] = float(bid_levels[0]["px"])
-                    
-                    if ask_levels and len(ask_levels) > 0:
-                        market_data["best_ask"] = float(ask_levels[0]["px"])
-                    
-                    # Calculate mid price if we have both bid and ask
-                    if "best_bid" in market_data and "best_ask" in market_data:
-                        market_data["mid_price"] = (market_data["best_bid"] + market_data["best_ask"]) / 2
-                        self.logger.info(f"Got price for {symbol} from order book: {market_data['mid_price']}")
-                
-                market_data["order_book"] = order_book
+                mid_price = self.get_mid_price(symbol)
+                if mid_price is not None:
+                    market_data["mid_price"] = mid_price
+                    self.logger.info("Got price for %s from all_mids: %s", symbol, market_data['mid_price'])
             except Exception as e:
-                self.logger.warning(f"Error getting order book for {symbol}: {str(e)}")
+                lookup_failed = True
+                self.logger.warning("Error getting all_mids for %s: %s", symbol, e)
             
-            # Method 2: Try all_mids if we don't have mid_price yet
-            if "mid_price" not in market_data:
+            # Method 2: Get order book
+            if include_order_book:
                 try:
-                    all_mids = self.info.all_mids()
-                    mid_price = all_mids.get(symbol, None)
-                    if mid_price is not None:
-                        market_data["mid_price"] = float(mid_price)
-                        self.logger.info(f"Got price for {symbol} from all_mids: {market_data['mid_price']}")
+                    self._apply_order_book(symbol, market_data, order_book_future.result())
                 except Exception as e:
-                    self.logger.warning(f"Error getting all_mids for {symbol}: {str(e)}")
+                    lookup_failed = True
+                    self.logger.warning("Error getting order book for %s: %s", symbol, e)
             
             # Method 3: Try metadata and last price if we still don't have a price
             if "mid_price" not in market_data:
                 try:
-                    meta = self.info.meta()
-                    for asset in meta.get("universe", []):
-                        if asset.get("name") == symbol:
-                            last_price = asset.get("lastPrice")
-                            if last_price:
-                                market_data["mid_price"] = float(last_price)
-                                self.logger.info(f"Got price for {symbol} from meta: {market_data['mid_price']}")
-                                break
+                    asset = self.get_asset_info(symbol)
+                    last_price = asset.get("lastPrice") if asset else None
+                    if last_price:
+                        market_data["mid_price"] = float(last_price)
+                        self.logger.info("Got price for %s from meta: %s", symbol, market_data['mid_price'])
                 except Exception as e:
-                    self.logger.warning(f"Error getting meta for {symbol}: {str(e)}")
+                    lookup_failed = True
+                    self.logger.warning("Error getting meta for %s: %s", symbol, e)
             
             # If we still don't have a price, try symbol info directly
             if "mid_price" not in market_data:
@@ -287,17 +691,22 @@ class ApiConnector:
                         ticker = self.info.ticker(symbol)
                         if ticker and "last" in ticker:
                             market_data["mid_price"] = float(ticker["last"])
-                            self.logger.info(f"Got price for {symbol} from ticker: {market_data['mid_price']}")
+                            self.logger.info("Got price for %s from ticker: %s", symbol, market_data['mid_price'])
                 except Exception as e:
-                    self.logger.warning(f"Error getting ticker for {symbol}: {str(e)}")
+                    lookup_failed = True
+                    self.logger.warning("Error getting ticker for %s: %s", symbol, e)
             
             # Log if we still couldn't get a price
             if "mid_price" not in market_data:
-                self.logger.error(f"Could not determine price for {symbol} using any method")
+                self.logger.error("Could not determine price for %s using any method", symbol)
+                if not lookup_failed:
+                    if len(self._unknown_symbols) >= 256:
+                        self._unknown_symbols.clear()
+                    self._unknown_symbols[symbol] = time.monotonic()
                 return {"error": f"Could not determine price for {symbol}"}
             
             return market_data
         
         except Exception as e:
-            self.logger.error(f"Error fetching market data for {symbol}: {str(e)}")
+            self.logger.error("Error fetching market data for %s: %s", symbol, e)
             return {"error": str(e)}
\ No newline at end of file
@@ -11,4 +11,19 @@ TESTNET_WS_URL = "wss://api.hyperliquid-testnet.xyz/ws"
 
 # Default parameters
 DEFAULT_SLIPPAGE = 0.03  # 3% slippage
-DEFAULT_LEVERAGE = 1     # 1x leverage
\ No newline at end of file
+DEFAULT_LEVERAGE = 1     # 1x leverage
+MIN_ORDER_VALUE = 10.0   # Smallest order notional (USD) the exchange accepts, except reduce-only
+
+# Cache lifetimes (seconds)
+BALANCES_CACHE_TTL = 3.0  # Reuse balances fetched within this window
+ALL_MIDS_CACHE_TTL = 0.5  # Mid prices are shared across symbols for this long
+META_CACHE_TTL = 30.0  # Asset universe changes rarely
+ORDER_BOOK_CACHE_TTL = 0.25  # Bursts of requests for one symbol share an L2 snapshot
+UNKNOWN_SYMBOL_CACHE_TTL = 5.0  # Symbols with no price anywhere are not retried for this long
+LEVERAGE_CACHE_TTL = 10.0  # Grid and scaled starts skip re-sending leverage set this recently
+USER_STATE_STREAM_MAX_AGE = 10.0  # Fall back to REST if the stream has been quiet this long
+
+# Exchange action pacing, shared by every order placed through one OrderHandler
+EXCHANGE_ACTION_BURST = 50  # Actions that may go out back to back
+EXCHANGE_ACTIONS_PER_SECOND = 10.0  # Sustained rate once the burst is used up
+BATCH_ORDERS_PER_WEIGHT = 40  # A batch costs one extra action per this many orders
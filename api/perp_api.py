@@ -1,6 +1,7 @@
-from typing import Dict, Any, Optional
+from typing import Annotated, Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator, confloat, conint
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, Field
 
 from order_handler import OrderHandler
 from api.api_connector import ApiConnector
@@ -16,6 +17,23 @@ MIN_SLIPPAGE = 0.0
 MAX_SLIPPAGE = 1.0
 MIN_LEVERAGE = 1
 MAX_LEVERAGE = 100
+MAX_BATCH_SYMBOLS = 100
+
+# Static parts of the check_connection error payloads; only the network is filled in at raise time
+_ERR_NOT_CONNECTED = {
+    "status": "error",
+    "message": "Not connected to exchange. Please connect first using the /connect endpoint",
+    "required_action": "Call POST /connect with your wallet credentials first"
+}
+_ERR_HANDLER_NOT_CONFIGURED = {
+    "status": "error",
+    "required_action": "Call POST /connect again to reconfigure the order handler"
+}
+_ERR_NO_WALLET = {
+    "status": "error",
+    "message": "Wallet address not set. Please reconnect.",
+    "required_action": "Call POST /connect again to set the wallet address"
+}
 
 # Shared instances
 api_connector = None
@@ -29,119 +47,137 @@ def set_instances(connector: ApiConnector, handler: OrderHandler):
 
 def check_connection():
     """Check if connected to exchange and raise appropriate error if not"""
-    if not api_connector.is_connected():
+    # Read the shared instances once; everything below works on the locals
+    connector, handler = api_connector, order_handler
+    network = connector._network_str
+    
+    if not connector.is_connected():
         raise HTTPException(
             status_code=400,
-            detail={
-                "status": "error",
-                "message": "Not connected to exchange. Please connect first using the /connect endpoint",
-                "required_action": "Call POST /connect with your wallet credentials first",
-                "current_network": api_connector.is_testnet() and "testnet" or "mainnet"
-            }
+            detail={**_ERR_NOT_CONNECTED, "current_network": network}
         )
     
-    network = "testnet" if api_connector.is_testnet() else "mainnet"
+    if handler._ready:
+        return network
     
-    if not order_handler.exchange or not order_handler.info:
+    if not handler.exchange or not handler.info:
         raise HTTPException(
             status_code=400,
             detail={
-                "status": "error",
+                **_ERR_HANDLER_NOT_CONFIGURED,
                 "message": f"Order handler not configured for {network}. Please reconnect.",
-                "required_action": "Call POST /connect again to reconfigure the order handler",
                 "current_network": network
             }
         )
     
-    if not order_handler.wallet_address:
+    if not handler.wallet_address:
         raise HTTPException(
             status_code=400,
-            detail={
-                "status": "error",
-                "message": "Wallet address not set. Please reconnect.",
-                "required_action": "Call POST /connect again to set the wallet address",
-                "current_network": network
-            }
+            detail={**_ERR_NO_WALLET, "current_network": network}
         )
     
     return network
 
 def create_order_response(result: Dict[str, Any], network: str, message: str) -> Dict[str, Any]:
-    """Create a standardized order response"""
+    """
+    Create a standardized order response
+    
+    Returned as a plain dict; FastAPI validates it against the route's response_model
+    and serializes it to JSON in pydantic-core.
+    """
+    # Handler results are fresh dicts, so tag them in place rather than copying
+    result["network"] = network
     return {
         "success": True,
         "message": message,
-        "data": {
-            **result,
-            "network": network
-        }
+        "data": result
     }
 
+# Constrained field types
+OrderSize = Annotated[float, Field(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE)]
+OrderPrice = Annotated[float, Field(gt=MIN_PRICE, le=MAX_PRICE)]
+Slippage = Annotated[float, Field(ge=MIN_SLIPPAGE, le=MAX_SLIPPAGE)]
+Leverage = Annotated[int, Field(ge=MIN_LEVERAGE, le=MAX_LEVERAGE)]
+
 # Base request model with common symbol validation
 class BaseRequest(BaseModel):
+    # Request bodies are read-only once validated
+    model_config = ConfigDict(frozen=True)
+    # Non-empty check runs in pydantic-core alongside the numeric bounds
     symbol: str = Field(
         ..., 
+        min_length=1,
         description="Trading pair symbol (can be any arbitrary value)",
-        example="BTC"
+        examples=["BTC"]
     )
 
-    @validator('symbol')
-    def validate_symbol(cls, v):
-        if not v or not isinstance(v, str):
-            raise ValueError('Symbol must be a non-empty string')
-        return v
-
 # Request Models
 class MarketOrderRequest(BaseRequest):
-    size: confloat(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE) = Field(
+    size: OrderSize = Field(
         ..., 
         description=f"Order size (between {MIN_ORDER_SIZE} and {MAX_ORDER_SIZE})",
-        example=0.1
+        examples=[0.1]
     )
-    leverage: conint(ge=MIN_LEVERAGE, le=MAX_LEVERAGE) = Field(
+    leverage: Leverage = Field(
         default=1,
         description=f"Leverage to use (between {MIN_LEVERAGE} and {MAX_LEVERAGE})",
-        example=1
+        examples=[1]
     )
-    slippage: confloat(ge=MIN_SLIPPAGE, le=MAX_SLIPPAGE) = Field(
+    slippage: Slippage = Field(
         default=0.05, 
         description=f"Maximum allowed slippage (between {MIN_SLIPPAGE} and {MAX_SLIPPAGE})",
-        example=0.05
+        examples=[0.05]
     )
 
 class LimitOrderRequest(BaseRequest):
-    size: confloat(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE) = Field(
+    size: OrderSize = Field(
         ..., 
         description=f"Order size (between {MIN_ORDER_SIZE} and {MAX_ORDER_SIZE})",
-        example=0.1
+        examples=[0.1]
     )
-    price: confloat(gt=MIN_PRICE, le=MAX_PRICE) = Field(
+    price: OrderPrice = Field(
         ..., 
         description=f"Order price (between {MIN_PRICE} and {MAX_PRICE})",
-        example=50000.0
+        examples=[50000.0]
     )
-    leverage: conint(ge=MIN_LEVERAGE, le=MAX_LEVERAGE) = Field(
+    leverage: Leverage = Field(
         default=1,
         description=f"Leverage to use (between {MIN_LEVERAGE} and {MAX_LEVERAGE})",
-        example=1
+        examples=[1]
     )
 
 class ClosePositionRequest(BaseRequest):
-    slippage: confloat(ge=MIN_SLIPPAGE, le=MAX_SLIPPAGE) = Field(
+    slippage: Slippage = Field(
         default=0.05, 
         description=f"Maximum allowed slippage (between {MIN_SLIPPAGE} and {MAX_SLIPPAGE})",
-        example=0.05
+        examples=[0.05]
     )
 
 class SetLeverageRequest(BaseRequest):
-    leverage: conint(ge=MIN_LEVERAGE, le=MAX_LEVERAGE) = Field(
+    leverage: Leverage = Field(
         ..., 
         description=f"Leverage to set (between {MIN_LEVERAGE} and {MAX_LEVERAGE})",
-        example=1
+        examples=[1]
+    )
+
+class MarketDataBatchRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    symbols: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SYMBOLS,
+        description=f"Symbols to fetch market data for (at most {MAX_BATCH_SYMBOLS})",
+        examples=[["BTC", "ETH", "SOL"]]
+    )
+    include_order_book: bool = Field(
+        default=False,
+        description="Whether to include best bid/ask and the L2 book for each symbol",
+        examples=[False]
     )
 
 # Response Model
 class OrderResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
     success: bool = Field(..., description="Whether the operation was successful")
     message: str = Field(..., description="Response message")
     data: Optional[Dict[str, Any]] = Field(None, description="Additional response data")
@@ -151,17 +187,19 @@ async def perp_market_buy(request: MarketOrderRequest):
     """Execute a perpetual market buy order"""
     try:
         network = check_connection()
-        result = order_handler.perp_market_buy(
+        result = await run_in_threadpool(
+            order_handler.perp_market_buy,
             symbol=request.symbol,
             size=request.size,
             leverage=request.leverage,
             slippage=request.slippage
         )
-        return OrderResponse(**create_order_response(
+        api_connector.invalidate_balances()
+        return create_order_response(
             result, 
             network, 
             f"Perpetual market buy order executed successfully on {network}"
-        ))
+        )
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -172,17 +210,19 @@ async def perp_market_sell(request: MarketOrderRequest):
     """Execute a perpetual market sell order"""
     try:
         network = check_connection()
-        result = order_handler.perp_market_sell(
+        result = await run_in_threadpool(
+            order_handler.perp_market_sell,
             symbol=request.symbol,
             size=request.size,
             leverage=request.leverage,
             slippage=request.slippage
         )
-        return OrderResponse(**create_order_response(
+        api_connector.invalidate_balances()
+        return create_order_response(
             result, 
             network, 
             f"Perpetual market sell order executed successfully on {network}"
-        ))
+        )
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -193,17 +233,19 @@ async def perp_limit_buy(request: LimitOrderRequest):
     """Place a perpetual limit buy order"""
     try:
         network = check_connection()
-        result = order_handler.perp_limit_buy(
+        result = await run_in_threadpool(
+            order_handler.perp_limit_buy,
             symbol=request.symbol,
             size=request.size,
             price=request.price,
             leverage=request.leverage
         )
-        return OrderResponse(**create_order_response(
+        api_connector.invalidate_balances()
+        return create_order_response(
             result, 
             network, 
             f"Perpetual limit buy order placed successfully on {network}"
-        ))
+        )
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -214,17 +256,19 @@ async def perp_limit_sell(request: LimitOrderRequest):
     """Place a perpetual limit sell order"""
     try:
         network = check_connection()
-        result = order_handler.perp_limit_sell(
+        result = await run_in_threadpool(
+            order_handler.perp_limit_sell,
             symbol=request.symbol,
             size=request.size,
             price=request.price,
             leverage=request.leverage
         )
-        return OrderResponse(**create_order_response(
+        api_connector.invalidate_balances()
+        return create_order_response(
             result, 
             network, 
             f"Perpetual limit sell order placed successfully on {network}"
-        ))
+        )
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -235,15 +279,17 @@ async def close_position(request: ClosePositionRequest):
     """Close an entire position for a symbol"""
     try:
         network = check_connection()
-        result = order_handler.close_position(
+        result = await run_in_threadpool(
+            order_handler.close_position,
             symbol=request.symbol,
             slippage=request.slippage
         )
-        return OrderResponse(**create_order_response(
+        api_connector.invalidate_balances()
+        return create_order_response(
             result, 
             network, 
             f"Position closed successfully on {network}"
-        ))
+        )
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -254,16 +300,37 @@ async def set_leverage(request: SetLeverageRequest):
     """Set leverage for a symbol"""
     try:
         network = check_connection()
-        result = order_handler._set_leverage(
+        result = await run_in_threadpool(
+            order_handler._set_leverage,
             symbol=request.symbol,
             leverage=request.leverage
         )
-        return OrderResponse(**create_order_response(
+        return create_order_response(
             result, 
             network, 
             f"Leverage set successfully on {network}"
-        ))
+        )
     except HTTPException as he:
         raise he
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) 
+
+@router.post("/market-data/batch", response_model=OrderResponse)
+async def market_data_batch(request: MarketDataBatchRequest):
+    """Get market data for several symbols in one request"""
+    try:
+        network = check_connection()
+        result = await run_in_threadpool(
+            api_connector.get_market_data_batch,
+            symbols=request.symbols,
+            include_order_book=request.include_order_book
+        )
+        return create_order_response(
+            {"market_data": result}, 
+            network, 
+            f"Market data retrieved for {len(result)} symbols on {network}"
+        )
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,7 @@
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator, confloat, conint
+from typing import Annotated, Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 import re
 
 from order_handler import OrderHandler
@@ -20,38 +21,65 @@ MAX_NUM_ORDERS = 100
 MIN_SKEW = -1.0
 MAX_SKEW = 1.0
 
+# Symbol format check, compiled once for every validator
+_SYMBOL_RE = re.compile(r'^[A-Z0-9]+/[A-Z0-9]+$')
+_COMMON_PAIRS = frozenset({'BTC/USDC', 'ETH/USDC', 'BNB/USDC', 'XRP/USDC'})
+
+# Static parts of the check_connection error payloads; only the network is filled in at raise time
+_ERR_NOT_CONNECTED = {
+    "status": "error",
+    "message": "Not connected to exchange. Please connect first using the /connect endpoint",
+    "required_action": "Call POST /connect with your wallet credentials first"
+}
+_ERR_HANDLER_NOT_CONFIGURED = {
+    "status": "error",
+    "required_action": "Call POST /connect again to reconfigure the order handler"
+}
+_ERR_NO_WALLET = {
+    "status": "error",
+    "message": "Wallet address not set. Please reconnect.",
+    "required_action": "Call POST /connect again to set the wallet address"
+}
+
 # These will be set by main.py
 api_connector = None
 order_handler = None
 
+# OrderHandler methods behind the generated order endpoints, bound once in set_instances
+_HANDLER_METHODS = ("scaled_orders", "perp_scaled_orders", "market_aware_scaled_buy", "market_aware_scaled_sell")
+_DISPATCH: Dict[str, Any] = {}
+
 def set_instances(connector: ApiConnector, handler: OrderHandler):
     """Set the shared instances from main.py"""
     global api_connector, order_handler
     api_connector = connector
     order_handler = handler
+    _DISPATCH.clear()
+    _DISPATCH.update({name: getattr(handler, name) for name in _HANDLER_METHODS})
 
-def check_connection():
-    """Check if connected to exchange and raise appropriate error if not"""
+def check_connection() -> str:
+    """
+    Check if connected to exchange and raise appropriate error if not
+    
+    Returns:
+        The current network name ("mainnet" or "testnet")
+    """
+    # The connector fixes its network name at connect time, so read it once here
+    network = api_connector._network_str
+    
     if not api_connector.is_connected():
         raise HTTPException(
             status_code=400,
-            detail={
-                "status": "error",
-                "message": "Not connected to exchange. Please connect first using the /connect endpoint",
-                "required_action": "Call POST /connect with your wallet credentials first",
-                "current_network": api_connector.is_testnet() and "testnet" or "mainnet"
-            }
+            detail={**_ERR_NOT_CONNECTED, "current_network": network}
         )
     
     # Ensure order handler is properly configured for current network
     if not order_handler.exchange or not order_handler.info:
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
         raise HTTPException(
             status_code=400,
             detail={
-                "status": "error",
+                **_ERR_HANDLER_NOT_CONFIGURED,
                 "message": f"Order handler not configured for {network}. Please reconnect.",
-                "required_action": "Call POST /connect again to reconfigure the order handler",
                 "current_network": network
             }
         )
@@ -60,121 +88,192 @@ def check_connection():
     if not order_handler.wallet_address:
         raise HTTPException(
             status_code=400,
-            detail={
-                "status": "error",
-                "message": "Wallet address not set. Please reconnect.",
-                "required_action": "Call POST /connect again to set the wallet address",
-                "current_network": api_connector.is_testnet() and "testnet" or "mainnet"
-            }
+            detail={**_ERR_NO_WALLET, "current_network": network}
         )
+    
+    return network
+
+def create_order_response(result: Dict[str, Any], network: str, message: str) -> Dict[str, Any]:
+    """
+    Create a standardized order response
+    
+    Returned as a plain dict; FastAPI validates it against the route's response_model
+    and serializes it to JSON in pydantic-core.
+    """
+    # Handler results are fresh dicts, so tag them in place rather than copying
+    result["network"] = network
+    return {
+        "success": True,
+        "message": message,
+        "data": result
+    }
+
+# Constrained field types
+OrderSize = Annotated[float, Field(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE)]
+OrderPrice = Annotated[float, Field(gt=MIN_PRICE, le=MAX_PRICE)]
+NumOrders = Annotated[int, Field(ge=MIN_NUM_ORDERS, le=MAX_NUM_ORDERS)]
+Skew = Annotated[float, Field(ge=MIN_SKEW, le=MAX_SKEW)]
+Leverage = Annotated[int, Field(ge=MIN_LEVERAGE, le=MAX_LEVERAGE)]
+PricePercent = Annotated[float, Field(gt=0.0, le=100.0)]
+
+# Request bodies are read-only and must not carry unknown fields
+_REQUEST_CONFIG = ConfigDict(frozen=True, extra='forbid')
 
 # Request Models
-class ScaledOrdersRequest(BaseModel):
+class _SymbolMixin(BaseModel):
+    """Shared symbol field for every scaled request (any format accepted unless a subclass validates it)"""
+    model_config = _REQUEST_CONFIG
     symbol: str = Field(
         ..., 
         description="Trading pair symbol (e.g., 'BTC/USDC', 'ETH/USDC', 'SOL/BTC', etc.)",
-        example="BTC/USDC"
+        examples=["BTC/USDC"]
     )
-    is_buy: bool = Field(
-        ...,
-        description="True for buy orders, False for sell orders",
-        example=True
-    )
-    total_size: confloat(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE) = Field(
+
+class _SizedOrderMixin(_SymbolMixin):
+    """Shared sizing fields for requests that split a total size over several orders"""
+    total_size: OrderSize = Field(
         ...,
         description=f"Total order size (between {MIN_ORDER_SIZE} and {MAX_ORDER_SIZE})",
-        example=0.1
+        examples=[0.1]
     )
-    num_orders: conint(ge=MIN_NUM_ORDERS, le=MAX_NUM_ORDERS) = Field(
+    num_orders: NumOrders = Field(
         ...,
         description=f"Number of orders to place (between {MIN_NUM_ORDERS} and {MAX_NUM_ORDERS})",
-        example=5
+        examples=[5]
     )
-    start_price: confloat(gt=MIN_PRICE, le=MAX_PRICE) = Field(
+    skew: Skew = Field(
+        default=0.0,
+        description=f"Order size skew factor (between {MIN_SKEW} and {MAX_SKEW})",
+        examples=[0.0]
+    )
+
+class ScaledOrdersRequest(_SizedOrderMixin):
+    is_buy: bool = Field(
+        ...,
+        description="True for buy orders, False for sell orders",
+        examples=[True]
+    )
+    start_price: OrderPrice = Field(
         ...,
         description=f"Starting price for the order range (between {MIN_PRICE} and {MAX_PRICE})",
-        example=50000.0
+        examples=[50000.0]
     )
-    end_price: confloat(gt=MIN_PRICE, le=MAX_PRICE) = Field(
+    end_price: OrderPrice = Field(
         ...,
         description=f"Ending price for the order range (between {MIN_PRICE} and {MAX_PRICE})",
-        example=51000.0
-    )
-    skew: confloat(ge=MIN_SKEW, le=MAX_SKEW) = Field(
-        default=0.0,
-        description=f"Order size skew factor (between {MIN_SKEW} and {MAX_SKEW})",
-        example=0.0
+        examples=[51000.0]
     )
     reduce_only: bool = Field(
         default=False,
         description="Whether orders should only reduce positions",
-        example=False
+        examples=[False]
     )
     check_market: bool = Field(
         default=True,
         description="Whether to check market conditions before placing orders",
-        example=True
+        examples=[True]
     )
 
-    @validator('symbol')
+    @field_validator('symbol')
+    @classmethod
     def validate_symbol(cls, v):
+        # Common pairs need no regex work
+        if v in _COMMON_PAIRS:
+            return v
         # Accept any valid trading pair format
-        if not re.match(r'^[A-Z0-9]+/[A-Z0-9]+$', v):
+        if not _SYMBOL_RE.match(v):
             raise ValueError('Invalid trading pair format. Use format like "BTC/USDC" or "ETH/USDC"')
         return v
 
 class PerpScaledOrdersRequest(ScaledOrdersRequest):
-    leverage: conint(ge=MIN_LEVERAGE, le=MAX_LEVERAGE) = Field(
+    leverage: Leverage = Field(
         default=1,
         description=f"Leverage to use (between {MIN_LEVERAGE} and {MAX_LEVERAGE})",
-        example=1
+        examples=[1]
     )
 
-    @validator('symbol')
+    @field_validator('symbol')
+    @classmethod
     def validate_symbol(cls, v):
         # Accept any symbol format
         return v
 
-class MarketAwareScaledRequest(BaseModel):
-    symbol: str = Field(
-        ..., 
-        description="Trading pair symbol (e.g., 'BTC/USDC', 'ETH/USDC', 'SOL/BTC', etc.)",
-        example="BTC/USDC"
+class MarketAwareScaledRequest(_SizedOrderMixin):
+    price_percent: PricePercent = Field(
+        default=3.0,
+        description="Price range as percentage of current market price",
+        examples=[3.0]
     )
-    total_size: confloat(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE) = Field(
+
+class BatchOrderItem(_SymbolMixin):
+    is_buy: bool = Field(
         ...,
-        description=f"Total order size (between {MIN_ORDER_SIZE} and {MAX_ORDER_SIZE})",
-        example=0.1
+        description="True for a buy order, False for a sell order",
+        examples=[True]
     )
-    num_orders: conint(ge=MIN_NUM_ORDERS, le=MAX_NUM_ORDERS) = Field(
+    size: OrderSize = Field(
         ...,
-        description=f"Number of orders to place (between {MIN_NUM_ORDERS} and {MAX_NUM_ORDERS})",
-        example=5
+        description=f"Order size (between {MIN_ORDER_SIZE} and {MAX_ORDER_SIZE})",
+        examples=[0.1]
     )
-    price_percent: confloat(gt=0.0, le=100.0) = Field(
-        default=3.0,
-        description="Price range as percentage of current market price",
-        example=3.0
+    price: OrderPrice = Field(
+        ...,
+        description=f"Limit price (between {MIN_PRICE} and {MAX_PRICE})",
+        examples=[50000.0]
     )
-    skew: confloat(ge=MIN_SKEW, le=MAX_SKEW) = Field(
-        default=0.0,
-        description=f"Order size skew factor (between {MIN_SKEW} and {MAX_SKEW})",
-        example=0.0
+    reduce_only: bool = Field(
+        default=False,
+        description="Whether the order should only reduce a position",
+        examples=[False]
     )
 
-    @validator('symbol')
-    def validate_symbol(cls, v):
-        # Accept any symbol format
-        return v
+class BatchOrdersRequest(BaseModel):
+    model_config = _REQUEST_CONFIG
+    orders: List[BatchOrderItem] = Field(
+        ...,
+        min_length=MIN_NUM_ORDERS,
+        max_length=MAX_NUM_ORDERS,
+        description=f"Limit orders to submit together (between {MIN_NUM_ORDERS} and {MAX_NUM_ORDERS})"
+    )
 
 # Response Models
 class OrderResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
     success: bool = Field(..., description="Whether the operation was successful")
     message: str = Field(..., description="Response message")
     data: Optional[Dict[str, Any]] = Field(None, description="Additional response data")
 
-@router.post("/scaled-orders", response_model=OrderResponse)
-async def scaled_orders(request: ScaledOrdersRequest):
+def _order_endpoint(method_name: str, request_model: type, message: str, doc: str, exclude: Optional[set] = None):
+    """
+    Build an endpoint that passes a validated request's fields to an OrderHandler method
+    
+    The handler call blocks on exchange round-trips, so it runs in the threadpool.
+    
+    Args:
+        method_name: OrderHandler method to call (also used as the endpoint name)
+        request_model: Request body model; its fields must match the method's keyword arguments
+        message: Success message, completed with " on {network}"
+        doc: Endpoint description shown in the API docs
+        exclude: Request fields the method doesn't accept
+    """
+    async def endpoint(request: request_model, network: str = Depends(check_connection)):
+        try:
+            result = await run_in_threadpool(
+                _DISPATCH[method_name],
+                **request.model_dump(exclude=exclude)
+            )
+            return create_order_response(result, network, f"{message} on {network}")
+        except HTTPException as he:
+            raise he
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    endpoint.__name__ = method_name
+    endpoint.__doc__ = doc
+    return endpoint
+
+router.post("/scaled-orders", response_model=OrderResponse)(_order_endpoint(
+    "scaled_orders", ScaledOrdersRequest, "Scaled orders placed successfully",
     """
     Place multiple orders across a price range with an optional skew
     
@@ -189,35 +288,10 @@ async def scaled_orders(request: ScaledOrdersRequest):
     - reduce_only: Whether orders should only reduce positions
     - check_market: Whether to check market conditions before placing orders
     """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.scaled_orders(
-            symbol=request.symbol,
-            is_buy=request.is_buy,
-            total_size=request.total_size,
-            num_orders=request.num_orders,
-            start_price=request.start_price,
-            end_price=request.end_price,
-            skew=request.skew,
-            reduce_only=request.reduce_only,
-            check_market=request.check_market
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Scaled orders placed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+))
 
-@router.post("/perp-scaled-orders", response_model=OrderResponse)
-async def perp_scaled_orders(request: PerpScaledOrdersRequest):
+router.post("/perp-scaled-orders", response_model=OrderResponse)(_order_endpoint(
+    "perp_scaled_orders", PerpScaledOrdersRequest, "Perpetual scaled orders placed successfully",
     """
     Place multiple perpetual orders across a price range with an optional skew
     
@@ -231,36 +305,12 @@ async def perp_scaled_orders(request: PerpScaledOrdersRequest):
     - leverage: Leverage to use (1-100)
     - skew: Order size skew factor (-1.0 to 1.0)
     - reduce_only: Whether orders should only reduce positions
-    """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.perp_scaled_orders(
-            symbol=request.symbol,
-            is_buy=request.is_buy,
-            total_size=request.total_size,
-            num_orders=request.num_orders,
-            start_price=request.start_price,
-            end_price=request.end_price,
-            leverage=request.leverage,
-            skew=request.skew,
-            reduce_only=request.reduce_only
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Perpetual scaled orders placed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    """,
+    exclude={"check_market"}
+))
 
-@router.post("/market-aware-scaled-buy", response_model=OrderResponse)
-async def market_aware_scaled_buy(request: MarketAwareScaledRequest):
+router.post("/market-aware-scaled-buy", response_model=OrderResponse)(_order_endpoint(
+    "market_aware_scaled_buy", MarketAwareScaledRequest, "Market-aware scaled buy orders placed successfully",
     """
     Place multiple buy orders across a price range with market awareness
     
@@ -271,31 +321,10 @@ async def market_aware_scaled_buy(request: MarketAwareScaledRequest):
     - price_percent: Price range as percentage of current market price
     - skew: Order size skew factor (-1.0 to 1.0)
     """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.market_aware_scaled_buy(
-            symbol=request.symbol,
-            total_size=request.total_size,
-            num_orders=request.num_orders,
-            price_percent=request.price_percent,
-            skew=request.skew
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Market-aware scaled buy orders placed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+))
 
-@router.post("/market-aware-scaled-sell", response_model=OrderResponse)
-async def market_aware_scaled_sell(request: MarketAwareScaledRequest):
+router.post("/market-aware-scaled-sell", response_model=OrderResponse)(_order_endpoint(
+    "market_aware_scaled_sell", MarketAwareScaledRequest, "Market-aware scaled sell orders placed successfully",
     """
     Place multiple sell orders across a price range with market awareness
     
@@ -306,25 +335,27 @@ async def market_aware_scaled_sell(request: MarketAwareScaledRequest):
     - price_percent: Price range as percentage of current market price
     - skew: Order size skew factor (-1.0 to 1.0)
     """
+))
+
+@router.post("/batch-orders", response_model=OrderResponse)
+async def batch_orders(request: BatchOrdersRequest, network: str = Depends(check_connection)):
+    """
+    Place several GTC limit orders in a single exchange request
+    
+    Parameters:
+    - orders: List of orders, each with symbol, is_buy, size, price and optional reduce_only
+    """
     try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.market_aware_scaled_sell(
-            symbol=request.symbol,
-            total_size=request.total_size,
-            num_orders=request.num_orders,
-            price_percent=request.price_percent,
-            skew=request.skew
+        result = await run_in_threadpool(
+            order_handler.batch_place,
+            [order.model_dump() for order in request.orders]
         )
-        return OrderResponse(
-            success=True,
-            message=f"Market-aware scaled sell orders placed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
+        return create_order_response(
+            result, 
+            network, 
+            f"Batch orders placed successfully on {network}"
         )
     except HTTPException as he:
         raise he
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e)) 
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,8 @@
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator, confloat, constr
+from typing import Annotated, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
 import re
 
 from order_handler import OrderHandler
@@ -16,38 +18,65 @@ MAX_PRICE = 1000000.0
 MIN_SLIPPAGE = 0.0
 MAX_SLIPPAGE = 1.0
 
+# Symbol format check, compiled once for every validator
+_SYMBOL_RE = re.compile(r'^[A-Z0-9]+/[A-Z0-9]+$')
+_COMMON_PAIRS = frozenset({'BTC/USDC', 'ETH/USDC', 'BNB/USDC', 'XRP/USDC'})
+
+# Static parts of the check_connection error payloads; only the network is filled in at raise time
+_ERR_NOT_CONNECTED = {
+    "status": "error",
+    "message": "Not connected to exchange. Please connect first using the /connect endpoint",
+    "required_action": "Call POST /connect with your wallet credentials first"
+}
+_ERR_HANDLER_NOT_CONFIGURED = {
+    "status": "error",
+    "required_action": "Call POST /connect again to reconfigure the order handler"
+}
+_ERR_NO_WALLET = {
+    "status": "error",
+    "message": "Wallet address not set. Please reconnect.",
+    "required_action": "Call POST /connect again to set the wallet address"
+}
+
 # These will be set by main.py
 api_connector = None
 order_handler = None
 
+# OrderHandler methods behind the generated order endpoints, bound once in set_instances
+_HANDLER_METHODS = ("market_buy", "market_sell", "limit_buy", "limit_sell", "cancel_order")
+_DISPATCH: Dict[str, Any] = {}
+
 def set_instances(connector: ApiConnector, handler: OrderHandler):
     """Set the shared instances from main.py"""
     global api_connector, order_handler
     api_connector = connector
     order_handler = handler
+    _DISPATCH.clear()
+    _DISPATCH.update({name: getattr(handler, name) for name in _HANDLER_METHODS})
 
-def check_connection():
-    """Check if connected to exchange and raise appropriate error if not"""
+def check_connection() -> str:
+    """
+    Check if connected to exchange and raise appropriate error if not
+    
+    Returns:
+        The current network name ("mainnet" or "testnet")
+    """
+    # The connector fixes its network name at connect time, so read it once here
+    network = api_connector._network_str
+    
     if not api_connector.is_connected():
         raise HTTPException(
             status_code=400,
-            detail={
-                "status": "error",
-                "message": "Not connected to exchange. Please connect first using the /connect endpoint",
-                "required_action": "Call POST /connect with your wallet credentials first",
-                "current_network": api_connector.is_testnet() and "testnet" or "mainnet"
-            }
+            detail={**_ERR_NOT_CONNECTED, "current_network": network}
         )
     
     # Ensure order handler is properly configured for current network
     if not order_handler.exchange or not order_handler.info:
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
         raise HTTPException(
             status_code=400,
             detail={
-                "status": "error",
+                **_ERR_HANDLER_NOT_CONFIGURED,
                 "message": f"Order handler not configured for {network}. Please reconnect.",
-                "required_action": "Call POST /connect again to reconfigure the order handler",
                 "current_network": network
             }
         )
@@ -56,124 +85,156 @@ def check_connection():
     if not order_handler.wallet_address:
         raise HTTPException(
             status_code=400,
-            detail={
-                "status": "error",
-                "message": "Wallet address not set. Please reconnect.",
-                "required_action": "Call POST /connect again to set the wallet address",
-                "current_network": api_connector.is_testnet() and "testnet" or "mainnet"
-            }
+            detail={**_ERR_NO_WALLET, "current_network": network}
         )
+    
+    return network
+
+def create_order_response(result: Dict[str, Any], network: str, message: str, **extra: Any) -> Dict[str, Any]:
+    """
+    Create a standardized order response
+    
+    Returned as a plain dict; FastAPI validates it against the route's response_model
+    and serializes it to JSON in pydantic-core.
+    """
+    # Handler results are fresh dicts, so tag them in place rather than copying
+    result["network"] = network
+    return {
+        "success": True,
+        "message": message,
+        **extra,
+        "data": result
+    }
+
+# Constrained field types
+OrderSize = Annotated[float, Field(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE)]
+OrderPrice = Annotated[float, Field(gt=MIN_PRICE, le=MAX_PRICE)]
+Slippage = Annotated[float, Field(ge=MIN_SLIPPAGE, le=MAX_SLIPPAGE)]
+
+# Request bodies are read-only and must not carry unknown fields
+_REQUEST_CONFIG = ConfigDict(frozen=True, extra='forbid')
 
 # Request Models
-class MarketOrderRequest(BaseModel):
+class _SymbolMixin(BaseModel):
+    """Shared symbol field and pair-format validation for every spot request"""
+    model_config = _REQUEST_CONFIG
     symbol: str = Field(
         ..., 
         description="Trading pair symbol (e.g., 'BTC/USDC')",
-        example="BTC/USDC"
-    )
-    size: confloat(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE) = Field(
-        ..., 
-        description=f"Order size (between {MIN_ORDER_SIZE} and {MAX_ORDER_SIZE})",
-        example=1
-    )
-    slippage: confloat(ge=MIN_SLIPPAGE, le=MAX_SLIPPAGE) = Field(
-        default=0.05, 
-        description=f"Maximum allowed slippage (between {MIN_SLIPPAGE} and {MAX_SLIPPAGE})",
-        example=0.05
+        examples=["BTC/USDC"]
     )
 
-    @validator('symbol')
+    @field_validator('symbol')
+    @classmethod
     def validate_symbol(cls, v):
-        # Additional validation for common trading pairs
-        common_pairs = ['BTC/USDC', 'ETH/USDC', 'BNB/USDC', 'XRP/USDC']
-        if v not in common_pairs:
-            # If not a common pair, validate the format
-            if not re.match(r'^[A-Z0-9]+/[A-Z0-9]+$', v):
-                raise ValueError('Invalid trading pair format. Use format like "BTC/USDC"')
+        # Common pairs (and an omitted optional symbol) need no further checks
+        if v is None or v in _COMMON_PAIRS:
+            return v
+        # If not a common pair, validate the format
+        if not _SYMBOL_RE.match(v):
+            raise ValueError('Invalid trading pair format. Use format like "BTC/USDC"')
         return v
 
-class LimitOrderRequest(BaseModel):
-    symbol: str = Field(
-        ..., 
-        description="Trading pair symbol (e.g., 'BTC/USDC')",
-        example="BTC/USDC"
-    )
-    size: confloat(gt=MIN_ORDER_SIZE, le=MAX_ORDER_SIZE) = Field(
+class _SizedOrderMixin(_SymbolMixin):
+    size: OrderSize = Field(
         ..., 
         description=f"Order size (between {MIN_ORDER_SIZE} and {MAX_ORDER_SIZE})",
-        example=0.1
-    )
-    price: confloat(gt=MIN_PRICE, le=MAX_PRICE) = Field(
-        ..., 
-        description=f"Order price (between {MIN_PRICE} and {MAX_PRICE})",
-        example=50000.0
+        examples=[0.1]
     )
 
-    @validator('symbol')
-    def validate_symbol(cls, v):
-        # Additional validation for common trading pairs
-        common_pairs = ['BTC/USDC', 'ETH/USDC', 'BNB/USDC', 'XRP/USDC']
-        if v not in common_pairs:
-            # If not a common pair, validate the format
-            if not re.match(r'^[A-Z0-9]+/[A-Z0-9]+$', v):
-                raise ValueError('Invalid trading pair format. Use format like "BTC/USDC"')
-        return v
+class MarketOrderRequest(_SizedOrderMixin):
+    slippage: Slippage = Field(
+        default=0.05, 
+        description=f"Maximum allowed slippage (between {MIN_SLIPPAGE} and {MAX_SLIPPAGE})",
+        examples=[0.05]
+    )
 
-class CancelOrderRequest(BaseModel):
-    symbol: str = Field(
+class LimitOrderRequest(_SizedOrderMixin):
+    price: OrderPrice = Field(
         ..., 
-        description="Trading pair symbol (e.g., 'BTC/USDC')",
-        example="BTC/USDC"
+        description=f"Order price (between {MIN_PRICE} and {MAX_PRICE})",
+        examples=[50000.0]
     )
+
+class CancelOrderRequest(_SymbolMixin):
     order_id: int = Field(
         ..., 
         description="Order ID to cancel",
         gt=0,
-        example=123456
+        examples=[123456]
     )
 
-    @validator('symbol')
-    def validate_symbol(cls, v):
-        # Additional validation for common trading pairs
-        common_pairs = ['BTC/USDC', 'ETH/USDC', 'BNB/USDC', 'XRP/USDC']
-        if v not in common_pairs:
-            # If not a common pair, validate the format
-            if not re.match(r'^[A-Z0-9]+/[A-Z0-9]+$', v):
-                raise ValueError('Invalid trading pair format. Use format like "BTC/USDC"')
-        return v
-
-class CancelAllOrdersRequest(BaseModel):
+class CancelAllOrdersRequest(_SymbolMixin):
     symbol: Optional[str] = Field(
         None, 
         description="Optional trading pair symbol to cancel orders for",
-        example="BTC/USDC"
+        examples=["BTC/USDC"]
     )
 
-    @validator('symbol')
-    def validate_symbol(cls, v):
-        if v is not None:
-            # Additional validation for common trading pairs
-            common_pairs = ['BTC/USDC', 'ETH/USDC', 'BNB/USDC', 'XRP/USDC']
-            if v not in common_pairs:
-                # If not a common pair, validate the format
-                if not re.match(r'^[A-Z0-9]+/[A-Z0-9]+$', v):
-                    raise ValueError('Invalid trading pair format. Use format like "BTC/USDC"')
-        return v
-
 # Response Models
 class OrderResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
     success: bool = Field(..., description="Whether the operation was successful")
     message: str = Field(..., description="Response message")
     data: Optional[Dict[str, Any]] = Field(None, description="Additional response data")
 
 class CancelAllOrdersResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
     success: bool = Field(..., description="Whether the operation was successful")
     message: str = Field(..., description="Response message")
     cancelled_orders: Optional[int] = Field(None, description="Number of orders cancelled")
     data: Optional[Dict[str, Any]] = Field(None, description="Additional response data")
 
-@router.post("/market-buy", response_model=OrderResponse)
-async def market_buy(request: MarketOrderRequest):
+async def _parse_body(request: Request, request_model: type) -> BaseModel:
+    """
+    Decode and validate a JSON request body in a single pydantic-core pass
+    
+    FastAPI would otherwise json.loads the body into Python objects and then
+    validate that dict as a second step.
+    
+    Raises:
+        RequestValidationError: Same 422 response FastAPI gives for a bad body
+    """
+    try:
+        return request_model.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+def _order_route(path: str, method_name: str, request_model: type, message: str, doc: str):
+    """
+    Register an endpoint that passes a validated request's fields to an OrderHandler method
+    
+    Args:
+        path: Route path under the spot prefix
+        method_name: OrderHandler method to call (also used as the endpoint name)
+        request_model: Request body model; its fields must match the method's keyword arguments
+        message: Success message, completed with " on {network}"
+        doc: Endpoint description shown in the API docs
+    """
+    async def endpoint(raw_request: Request, network: str = Depends(check_connection)):
+        request = await _parse_body(raw_request, request_model)
+        try:
+            result = await run_in_threadpool(_DISPATCH[method_name], **request.model_dump())
+            return create_order_response(result, network, f"{message} on {network}")
+        except HTTPException as he:
+            raise he
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    endpoint.__name__ = method_name
+    endpoint.__doc__ = doc
+    # The body is read by hand, so describe it for the API docs explicitly
+    body_schema = {"application/json": {"schema": request_model.model_json_schema()}}
+    router.post(
+        path,
+        response_model=OrderResponse,
+        openapi_extra={"requestBody": {"required": True, "content": body_schema}}
+    )(endpoint)
+
+_order_route(
+    "/market-buy", "market_buy", MarketOrderRequest, "Market buy order executed successfully",
     """
     Execute a market buy order
     
@@ -182,29 +243,10 @@ async def market_buy(request: MarketOrderRequest):
     - size: Order size (0.0001-1000)
     - slippage: Maximum allowed slippage (0-1)
     """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.market_buy(
-            symbol=request.symbol,
-            size=request.size,
-            slippage=request.slippage
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Market buy order executed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+)
 
-@router.post("/market-sell", response_model=OrderResponse)
-async def market_sell(request: MarketOrderRequest):
+_order_route(
+    "/market-sell", "market_sell", MarketOrderRequest, "Market sell order executed successfully",
     """
     Execute a market sell order
     
@@ -213,29 +255,10 @@ async def market_sell(request: MarketOrderRequest):
     - size: Order size (0.0001-1000)
     - slippage: Maximum allowed slippage (0-1)
     """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.market_sell(
-            symbol=request.symbol,
-            size=request.size,
-            slippage=request.slippage
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Market sell order executed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+)
 
-@router.post("/limit-buy", response_model=OrderResponse)
-async def limit_buy(request: LimitOrderRequest):
+_order_route(
+    "/limit-buy", "limit_buy", LimitOrderRequest, "Limit buy order placed successfully",
     """
     Place a limit buy order
     
@@ -244,29 +267,10 @@ async def limit_buy(request: LimitOrderRequest):
     - size: Order size (0.0001-1000)
     - price: Order price (0.0001-1000000)
     """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.limit_buy(
-            symbol=request.symbol,
-            size=request.size,
-            price=request.price
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Limit buy order placed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+)
 
-@router.post("/limit-sell", response_model=OrderResponse)
-async def limit_sell(request: LimitOrderRequest):
+_order_route(
+    "/limit-sell", "limit_sell", LimitOrderRequest, "Limit sell order placed successfully",
     """
     Place a limit sell order
     
@@ -275,29 +279,10 @@ async def limit_sell(request: LimitOrderRequest):
     - size: Order size (0.0001-1000)
     - price: Order price (0.0001-1000000)
     """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.limit_sell(
-            symbol=request.symbol,
-            size=request.size,
-            price=request.price
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Limit sell order placed successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+)
 
-@router.post("/cancel-order", response_model=OrderResponse)
-async def cancel_order(request: CancelOrderRequest):
+_order_route(
+    "/cancel-order", "cancel_order", CancelOrderRequest, "Order cancelled successfully",
     """
     Cancel a specific order
     
@@ -305,28 +290,10 @@ async def cancel_order(request: CancelOrderRequest):
     - symbol: Trading pair (e.g., 'BTC/USDC')
     - order_id: Order ID to cancel (must be positive)
     """
-    try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.cancel_order(
-            symbol=request.symbol,
-            order_id=request.order_id
-        )
-        return OrderResponse(
-            success=True,
-            message=f"Order cancelled successfully on {network}",
-            data={
-                **result,
-                "network": network
-            }
-        )
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+)
 
 @router.post("/cancel-all-orders", response_model=CancelAllOrdersResponse)
-async def cancel_all_orders(request: CancelAllOrdersRequest):
+async def cancel_all_orders(request: CancelAllOrdersRequest, network: str = Depends(check_connection)):
     """
     Cancel all open orders, optionally filtered by symbol
     
@@ -334,17 +301,12 @@ async def cancel_all_orders(request: CancelAllOrdersRequest):
     - symbol: Optional trading pair to cancel orders for (e.g., 'BTC/USDC')
     """
     try:
-        check_connection()
-        network = "testnet" if api_connector.is_testnet() else "mainnet"
-        result = order_handler.cancel_all_orders(symbol=request.symbol)
-        return CancelAllOrdersResponse(
-            success=True,
-            message=f"All orders cancelled successfully on {network}",
-            cancelled_orders=result.get("cancelled_orders"),
-            data={
-                **result,
-                "network": network
-            }
+        result = await run_in_threadpool(order_handler.cancel_all_orders, symbol=request.symbol)
+        return create_order_response(
+            result, 
+            network, 
+            f"All orders cancelled successfully on {network}",
+            cancelled_orders=result.get("cancelled_orders")
         )
     except HTTPException as he:
         raise he
@@ -7,6 +7,8 @@ Organized in the requested order:
 4. Scaled
 """
 
+from types import MappingProxyType
+
 # Base URL (when running locally)
 BASE_URL = "http://0.0.0.0:8000"
 
@@ -35,7 +37,8 @@ PERP_ENDPOINTS = {
     "limit_buy": f"{BASE_URL}/api/v1/perp/limit-buy",
     "limit_sell": f"{BASE_URL}/api/v1/perp/limit-sell",
     "close_position": f"{BASE_URL}/api/v1/perp/close-position",
-    "set_leverage": f"{BASE_URL}/api/v1/perp/set-leverage"
+    "set_leverage": f"{BASE_URL}/api/v1/perp/set-leverage",
+    "market_data_batch": f"{BASE_URL}/api/v1/perp/market-data/batch"
 }
 
 # 4. Scaled Order API Endpoints
@@ -43,18 +46,23 @@ SCALED_ENDPOINTS = {
     "scaled_orders": f"{BASE_URL}/api/v1/scaled/scaled-orders",
     "perp_scaled_orders": f"{BASE_URL}/api/v1/scaled/perp-scaled-orders",
     "market_aware_scaled_buy": f"{BASE_URL}/api/v1/scaled/market-aware-scaled-buy",
-    "market_aware_scaled_sell": f"{BASE_URL}/api/v1/scaled/market-aware-scaled-sell"
+    "market_aware_scaled_sell": f"{BASE_URL}/api/v1/scaled/market-aware-scaled-sell",
+    "batch_orders": f"{BASE_URL}/api/v1/scaled/batch-orders"
 }
 
+# All endpoints as one flat, read-only mapping (later groups win on shared names),
+# built once at import
+ALL_ENDPOINTS = MappingProxyType({
+    **DEFAULT_ENDPOINTS,
+    **SPOT_ENDPOINTS,
+    **PERP_ENDPOINTS,
+    **SCALED_ENDPOINTS
+})
+
 # Helper function to get all endpoints as a flat dictionary
 def get_all_endpoints():
-    """Return all endpoints as a single dictionary"""
-    all_endpoints = {}
-    all_endpoints.update(DEFAULT_ENDPOINTS)
-    all_endpoints.update(SPOT_ENDPOINTS)
-    all_endpoints.update(PERP_ENDPOINTS)
-    all_endpoints.update(SCALED_ENDPOINTS)
-    return all_endpoints
+    """Return all endpoints as a single read-only mapping"""
+    return ALL_ENDPOINTS
 
 # Helper function for creating a connection request payload
 def create_connection_payload(wallet_address, secret_key, network="testnet"):
@@ -4,13 +4,23 @@ Core package for Elysium Trading Platform.
 This package contains core functionality:
 - config_manager: Manages configuration settings
 - utils: Utility functions
+
+Names are resolved lazily (PEP 562), so importing one submodule does not
+import the other.
 """
 
-from core.config_manager import ConfigManager
-from core.utils import (
-    setup_logging, format_number, format_price, 
-    format_size, format_timestamp, print_table
-)
+import importlib
+
+# Public name -> module that defines it
+_LAZY = {
+    'ConfigManager': 'core.config_manager',
+    'setup_logging': 'core.utils',
+    'format_number': 'core.utils',
+    'format_price': 'core.utils',
+    'format_size': 'core.utils',
+    'format_timestamp': 'core.utils',
+    'print_table': 'core.utils',
+}
 
 __all__ = [
     'ConfigManager',
@@ -20,4 +30,15 @@ __all__ = [
     'format_size',
     'format_timestamp',
     'print_table',
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    module_name = _LAZY.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
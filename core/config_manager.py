@@ -1,11 +1,19 @@
 import os
-import json
+import orjson
+import atexit
+import threading
 import hashlib
-import random
-import string
+import hmac
+import secrets
 import logging
 from typing import Dict, Any, Optional
 
+# PBKDF2-HMAC-SHA256 work factor for new password hashes; stored with the hash so it can be raised later
+PASSWORD_HASH_ITERATIONS = 200_000
+
+# How long set/delete/save_* wait for further changes before writing the file
+SAVE_DEBOUNCE_SECONDS = 0.1
+
 class ConfigManager:
     """Manages configuration settings for Elysium Trading Platform"""
     
@@ -13,27 +21,75 @@ class ConfigManager:
         self.config_file = config_file
         self.config = self.load_config()
         self.logger = logging.getLogger(__name__)
+        # Pending debounced save; changes are flushed together once the timer fires
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        atexit.register(self._flush)
         
+    @property
+    def config_dir(self) -> str:
+        """Directory holding the config file, where other local state files are kept too"""
+        return os.path.dirname(os.path.abspath(self.config_file))
+    
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from file"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
+            with open(self.config_file, 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
             return {}
         except Exception as e:
-            logging.error(f"Error loading config: {str(e)}")
+            logging.error("Error loading config: %s", e)
             return {}
     
     def save_config(self) -> bool:
-        """Save current configuration to file"""
+        """Save current configuration to file immediately, replacing any pending debounced save"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._dirty = False
+            try:
+                # Serialize up front so the file gets one write, then swap it in atomically
+                data = orjson.dumps(self.config, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                tmp_file = f"{self.config_file}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.config_file)
+                self._fsync_config_dir()
+                return True
+            except Exception as e:
+                logging.error("Error saving config: %s", e)
+                return False
+    
+    def _fsync_config_dir(self) -> None:
+        """Flush the directory entry so the rename itself survives a crash (POSIX only)"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        dir_fd = os.open(self.config_dir, os.O_DIRECTORY)
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    
+    def _schedule_save(self) -> None:
+        """Mark the config dirty and (re)start the debounce timer that writes it"""
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self._flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def _flush(self) -> bool:
+        """Write the config if a debounced save is still pending"""
+        if not self._dirty:
             return True
-        except Exception as e:
-            logging.error(f"Error saving config: {str(e)}")
-            return False
+        return self.save_config()
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get a configuration value"""
@@ -42,22 +98,32 @@ class ConfigManager:
     def set(self, key: str, value: Any) -> None:
         """Set a configuration value"""
         self.config[key] = value
-        self.save_config()
+        self._schedule_save()
     
     def delete(self, key: str) -> None:
         """Delete a configuration value"""
         if key in self.config:
             del self.config[key]
-            self.save_config()
+            self._schedule_save()
     
     # Password management methods
     def generate_salt(self) -> str:
         """Generate a random salt for password hashing"""
-        return ''.join(random.choices(string.ascii_letters + string.digits, k=16))
+        return secrets.token_hex(16)
     
-    def hash_password(self, password: str, salt: str) -> str:
-        """Hash a password with the given salt"""
-        return hashlib.sha256((password + salt).encode()).hexdigest()
+    def hash_password(self, password: str, salt: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+        """
+        Hash a password with the given salt using PBKDF2-HMAC-SHA256
+        
+        Args:
+            password: Plain-text password
+            salt: Salt stored alongside the hash
+            iterations: PBKDF2 work factor
+            
+        Returns:
+            Hex-encoded 32-byte derived key
+        """
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations, dklen=32).hex()
     
     def set_password(self, password: str) -> bool:
         """Set a new password"""
@@ -66,20 +132,30 @@ class ConfigManager:
             hashed = self.hash_password(password, salt)
             self.config['password_hash'] = hashed
             self.config['salt'] = salt
+            self.config['password_iterations'] = PASSWORD_HASH_ITERATIONS
             return self.save_config()
         except Exception as e:
-            self.logger.error(f"Error setting password: {str(e)}")
+            self.logger.error("Error setting password: %s", e)
             return False
     
     def verify_password(self, password: str) -> bool:
         """Verify if the provided password is correct"""
         try:
             if 'password_hash' in self.config and 'salt' in self.config:
-                hashed = self.hash_password(password, self.config['salt'])
-                return hashed == self.config['password_hash']
+                salt = self.config['salt']
+                iterations = self.config.get('password_iterations')
+                if iterations is None:
+                    # Hash written before the switch to PBKDF2: check it the old way, then upgrade it
+                    hashed = hashlib.sha256((password + salt).encode()).hexdigest()
+                    if not hmac.compare_digest(hashed, self.config['password_hash']):
+                        return False
+                    self.set_password(password)
+                    return True
+                hashed = self.hash_password(password, salt, iterations)
+                return hmac.compare_digest(hashed, self.config['password_hash'])
             return False
         except Exception as e:
-            self.logger.error(f"Error verifying password: {str(e)}")
+            self.logger.error("Error verifying password: %s", e)
             return False
     
     # Trading configuration
@@ -87,9 +163,10 @@ class ConfigManager:
         """Save trading configuration"""
         try:
             self.config['trading'] = trading_config
-            return self.save_config()
+            self._schedule_save()
+            return True
         except Exception as e:
-            self.logger.error(f"Error saving trading config: {str(e)}")
+            self.logger.error("Error saving trading config: %s", e)
             return False
     
     def get_trading_config(self) -> Dict[str, Any]:
@@ -101,9 +178,10 @@ class ConfigManager:
         """Save UI preferences"""
         try:
             self.config['ui_preferences'] = ui_prefs
-            return self.save_config()
+            self._schedule_save()
+            return True
         except Exception as e:
-            self.logger.error(f"Error saving UI preferences: {str(e)}")
+            self.logger.error("Error saving UI preferences: %s", e)
             return False
     
     def get_ui_preferences(self) -> Dict[str, Any]:
@@ -117,9 +195,10 @@ class ConfigManager:
             if 'strategies' not in self.config:
                 self.config['strategies'] = {}
             self.config['strategies'][strategy_id] = settings
-            return self.save_config()
+            self._schedule_save()
+            return True
         except Exception as e:
-            self.logger.error(f"Error saving strategy settings: {str(e)}")
+            self.logger.error("Error saving strategy settings: %s", e)
             return False
     
     def get_strategy_settings(self, strategy_id: str) -> Dict[str, Any]:
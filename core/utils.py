@@ -1,11 +1,30 @@
-import os
 import sys
 import time
-import json
+import threading
+import orjson
 import logging
+from bisect import bisect_right
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 
+# Log level names accepted by setup_logging
+_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL
+}
+
+_elysium_logger = logging.getLogger("elysium")
+
+# Decimal places by magnitude: a value below THRESHOLDS[i] uses FMTS[i], anything larger the last one
+_PRICE_THRESHOLDS = (0.001, 1.0, 10.0)
+_PRICE_FMTS = ("{:.8f}", "{:.6f}", "{:.4f}", "{:.2f}")
+_SIZE_THRESHOLDS = (0.001, 1.0)
+_SIZE_FMTS = ("{:.8f}", "{:.4f}", "{:.2f}")
+
 def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
     """
     Set up logging configuration
@@ -18,18 +37,19 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> lo
         Logger instance
     """
     # Convert string log level to logging constant
-    numeric_level = getattr(logging, log_level.upper(), logging.INFO)
+    numeric_level = _LEVELS.get(log_level.upper(), logging.INFO)
     
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
-    # Configure the root logger
-    logging.basicConfig(
-        level=numeric_level,
-        format=log_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    # Configure the root logger (basicConfig would be a no-op once it has handlers)
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=numeric_level,
+            format=log_format,
+            handlers=[
+                logging.StreamHandler(sys.stdout)
+            ]
+        )
     
     # Add file handler if specified
     if log_file:
@@ -37,7 +57,7 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> lo
         file_handler.setFormatter(logging.Formatter(log_format))
         logging.getLogger().addHandler(file_handler)
     
-    return logging.getLogger("elysium")
+    return _elysium_logger
 
 def format_number(number: float, decimal_places: int = 2) -> str:
     """
@@ -52,6 +72,7 @@ def format_number(number: float, decimal_places: int = 2) -> str:
     """
     return f"{number:.{decimal_places}f}"
 
+@lru_cache(maxsize=4096)
 def format_price(price: float) -> str:
     """
     Format a price with appropriate decimal places
@@ -62,15 +83,9 @@ def format_price(price: float) -> str:
     Returns:
         Formatted price string
     """
-    if price < 0.001:
-        return f"{price:.8f}"
-    elif price < 1:
-        return f"{price:.6f}"
-    elif price < 10:
-        return f"{price:.4f}"
-    else:
-        return f"{price:.2f}"
+    return _PRICE_FMTS[bisect_right(_PRICE_THRESHOLDS, price)].format(price)
 
+@lru_cache(maxsize=4096)
 def format_size(size: float) -> str:
     """
     Format a size with appropriate decimal places
@@ -81,12 +96,7 @@ def format_size(size: float) -> str:
     Returns:
         Formatted size string
     """
-    if size < 0.001:
-        return f"{size:.8f}"
-    elif size < 1:
-        return f"{size:.4f}"
-    else:
-        return f"{size:.2f}"
+    return _SIZE_FMTS[bisect_right(_SIZE_THRESHOLDS, size)].format(size)
 
 def format_timestamp(timestamp: int) -> str:
     """
@@ -109,26 +119,34 @@ def print_table(headers: List[str], rows: List[List[Any]], title: Optional[str]
         rows: List of rows, each containing data for each column
         title: Optional title for the table
     """
-    # Calculate column widths
-    col_widths = [len(str(h)) for h in headers]
-    for row in rows:
+    # Convert every cell to a string once, then size the columns from those
+    str_headers = [str(h) for h in headers]
+    str_rows = [[str(cell) for cell in row] for row in rows]
+    col_widths = [len(h) for h in str_headers]
+    for row in str_rows:
         for i, cell in enumerate(row):
-            col_widths[i] = max(col_widths[i], len(str(cell)))
+            if len(cell) > col_widths[i]:
+                col_widths[i] = len(cell)
+    
+    lines = []
     
-    # Print title if provided
+    # Title if provided
     if title:
-        print(f"\n{title}")
-        print("=" * len(title))
+        lines.append(f"\n{title}")
+        lines.append("=" * len(title))
+    
+    # Headers
+    header_str = " | ".join(h.ljust(col_widths[i]) for i, h in enumerate(str_headers))
+    lines.append(header_str)
+    lines.append("-" * len(header_str))
     
-    # Print headers
-    header_str = " | ".join(str(h).ljust(col_widths[i]) for i, h in enumerate(headers))
-    print(header_str)
-    print("-" * len(header_str))
+    # Rows
+    for row in str_rows:
+        lines.append(" | ".join(cell.ljust(col_widths[i]) for i, cell in enumerate(row)))
     
-    # Print rows
-    for row in rows:
-        row_str = " | ".join(str(cell).ljust(col_widths[i]) for i, cell in enumerate(row))
-        print(row_str)
+    # Emit the whole table with a single write
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
 def load_json_file(file_path: str, default: Any = None) -> Any:
     """
@@ -142,12 +160,12 @@ def load_json_file(file_path: str, default: Any = None) -> Any:
         Loaded JSON data or default value
     """
     try:
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                return json.load(f)
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
         return default
     except Exception as e:
-        logging.error(f"Error loading JSON file {file_path}: {str(e)}")
+        logging.error("Error loading JSON file %s: %s", file_path, e)
         return default
 
 def save_json_file(file_path: str, data: Any) -> bool:
@@ -162,11 +180,13 @@ def save_json_file(file_path: str, data: Any) -> bool:
         True if successful, False otherwise
     """
     try:
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Serialize up front so the file gets a single write
+        data_bytes = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        with open(file_path, 'wb') as f:
+            f.write(data_bytes)
         return True
     except Exception as e:
-        logging.error(f"Error saving to JSON file {file_path}: {str(e)}")
+        logging.error("Error saving to JSON file %s: %s", file_path, e)
         return False
 
 def safe_float(value: Any, default: float = 0.0) -> float:
@@ -185,6 +205,29 @@ def safe_float(value: Any, default: float = 0.0) -> float:
     except (ValueError, TypeError):
         return default
 
+def reference_price(market_data: Dict[str, Any]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Pick a single current price from a get_market_data result
+    
+    Candidates are tried in order: mid price, average of best bid and ask,
+    best bid, best ask. The first non-zero one wins.
+    
+    Args:
+        market_data: Market data dictionary
+        
+    Returns:
+        Tuple of (price, name of the source used), or (None, None) if none is available
+    """
+    best_bid = market_data.get("best_bid")
+    best_ask = market_data.get("best_ask")
+    candidates = (
+        ("mid_price", market_data.get("mid_price")),
+        ("bid_ask_mid", (best_bid + best_ask) / 2 if best_bid and best_ask else None),
+        ("best_bid", best_bid),
+        ("best_ask", best_ask)
+    )
+    return next(((price, source) for source, price in candidates if price), (None, None))
+
 def calculate_pnl_metrics(fills: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Calculate PnL metrics from trading history
@@ -208,19 +251,27 @@ def calculate_pnl_metrics(fills: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
     
     total_trades = len(fills)
-    total_volume = sum(safe_float(fill.get("sz", 0)) * safe_float(fill.get("px", 0)) for fill in fills)
-    total_pnl = sum(safe_float(fill.get("closedPnl", 0)) for fill in fills)
+    total_volume = 0.0
+    total_pnl = 0.0
+    win_count = loss_count = 0
+    win_sum = loss_sum = 0.0
     
-    # Separate wins and losses
-    wins = [safe_float(fill.get("closedPnl", 0)) for fill in fills if safe_float(fill.get("closedPnl", 0)) > 0]
-    losses = [safe_float(fill.get("closedPnl", 0)) for fill in fills if safe_float(fill.get("closedPnl", 0)) < 0]
+    # One pass over the fills, converting each field once
+    for fill in fills:
+        total_volume += safe_float(fill.get("sz", 0)) * safe_float(fill.get("px", 0))
+        pnl = safe_float(fill.get("closedPnl", 0))
+        total_pnl += pnl
+        if pnl > 0:
+            win_count += 1
+            win_sum += pnl
+        elif pnl < 0:
+            loss_count += 1
+            loss_sum += pnl
     
-    win_count = len(wins)
-    loss_count = len(losses)
     win_rate = (win_count / total_trades) * 100 if total_trades > 0 else 0
     
-    avg_win = sum(wins) / win_count if win_count > 0 else 0
-    avg_loss = sum(losses) / loss_count if loss_count > 0 else 0
+    avg_win = win_sum / win_count if win_count > 0 else 0
+    avg_loss = loss_sum / loss_count if loss_count > 0 else 0
     
     return {
         "total_trades": total_trades,
@@ -233,6 +284,41 @@ def calculate_pnl_metrics(fills: List[Dict[str, Any]]) -> Dict[str, Any]:
         "avg_loss": avg_loss
     }
 
+class TokenBucket:
+    """
+    Thread-safe token bucket for pacing requests against a rate limit
+    
+    Up to capacity requests go through immediately; beyond that, callers block
+    only as long as it takes for enough tokens to refill.
+    """
+    
+    def __init__(self, capacity: float, refill_rate: float):
+        """
+        Args:
+            capacity: Largest burst allowed, in tokens
+            refill_rate: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Take tokens from the bucket, sleeping until they are available"""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.refill_rate
+            # Sleep without the lock so other callers can still see the refill
+            time.sleep(wait)
+
 class Colors:
     """ANSI color codes for terminal output"""
     HEADER = '\033[95m'
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import signal
 import argparse
 import threading
 import importlib.util
@@ -14,20 +15,17 @@ from core.utils import setup_logging
 # Import API and order execution modules
 from api.api_connector import ApiConnector
 from order_handler import OrderHandler
+from order_execution.grid_trading import GRID_HISTORY_FILE
 
 # Import UI modules
 from ui.terminal_ui import ElysiumTerminalUI
 
-# Try to import the Telegram bot module
-TELEGRAM_AVAILABLE = False
-try:
-    from ui.telegram_bot import ElysiumTelegramBot, notify_telegram_bot
-    TELEGRAM_AVAILABLE = True
-except ImportError:
-    pass
+# Check for the Telegram dependency without importing it; the bot module itself
+# is only imported in main() when the bot is actually started
+TELEGRAM_AVAILABLE = importlib.util.find_spec("telegram") is not None
 
-def parse_arguments():
-    """Parse command line arguments"""
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command line argument parser"""
     parser = argparse.ArgumentParser(description='Elysium Trading Platform')
     parser.add_argument('-c', '--config', type=str, default='elysium_config.json',
                         help='Path to configuration file')
@@ -42,61 +40,15 @@ def parse_arguments():
     parser.add_argument('--telegram-only', action='store_true',
                         help='Run only the Telegram bot (no terminal UI)')
     
-    return parser.parse_args()
+    return parser
 
 
-def is_telegram_dependencies_installed():
-    """Check if the required Telegram dependencies are installed"""
-    try:
-        import telegram
-        import telegram.ext
-        return True
-    except ImportError:
-        return False
+_PARSER = _build_parser()
 
 
-def create_telegram_bot_module(logger):
-    """Create the Telegram bot module if it doesn't exist"""
-    # First, check if the file already exists
-    if os.path.exists("ui/telegram_bot.py"):
-        logger.info("Telegram bot module already exists")
-        return
-    
-    # If file doesn't exist, check if we can import it
-    if not is_telegram_dependencies_installed():
-        logger.warning("python-telegram-bot is not installed. Run 'pip install python-telegram-bot==13.7 urllib3==1.26.15 httpx==0.23.0'")
-        return
-    
-    # Get the directory of the current script
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Find the path to the telegram bot source file
-    bot_file_paths = [
-        os.path.join(current_dir, "elysium_telegram_bot.py"),
-        os.path.join(current_dir, "updated-telegram-bot.py"),
-        os.path.join(current_dir, "ui/telegram_bot.py")
-    ]
-    
-    source_file_path = None
-    for path in bot_file_paths:
-        if os.path.exists(path):
-            source_file_path = path
-            break
-    
-    if source_file_path:
-        # Make sure the ui directory exists
-        os.makedirs("ui", exist_ok=True)
-        
-        # Copy the file
-        with open(source_file_path, 'r') as source_file:
-            content = source_file.read()
-        
-        with open("ui/telegram_bot.py", 'w') as target_file:
-            target_file.write(content)
-        
-        logger.info(f"Created ui/telegram_bot.py from {source_file_path}")
-    else:
-        logger.warning("Could not find source file to create telegram_bot.py")
+def parse_arguments():
+    """Parse command line arguments"""
+    return _PARSER.parse_args()
 
 
 def main():
@@ -110,14 +62,15 @@ def main():
     
     logger.info("Starting Elysium Trading Platform")
     
-    # Create Telegram bot module if needed
-    if not args.no_telegram:
-        create_telegram_bot_module(logger)
+    # ui/telegram_bot.py ships with the package; only the library may be missing
+    if not args.no_telegram and not TELEGRAM_AVAILABLE:
+        logger.warning("python-telegram-bot is not installed. Run 'pip install python-telegram-bot==13.7 urllib3==1.26.15 httpx==0.23.0'")
     
     # Initialize components
     config_manager = ConfigManager(args.config)
     api_connector = ApiConnector()
-    order_handler = OrderHandler()  # Will be initialized when connected
+    # Will be initialized when connected; stopped grids are archived next to the config file
+    order_handler = OrderHandler(grid_history_file=os.path.join(config_manager.config_dir, GRID_HISTORY_FILE))
     telegram_bot = None
     
     try:
@@ -128,13 +81,12 @@ def main():
                 from ui.telegram_bot import ElysiumTelegramBot, notify_telegram_bot
                 
                 telegram_bot = ElysiumTelegramBot(api_connector, order_handler, config_manager, logger)
-                # Start the Telegram bot in a separate thread
-                telegram_thread = threading.Thread(target=telegram_bot.start)
-                telegram_thread.daemon = True
-                telegram_thread.start()
+                # start() only kicks off polling and the command processor, both on
+                # their own threads, so it returns straight away
+                telegram_bot.start()
                 logger.info("Telegram bot started in background")
             except Exception as e:
-                logger.error(f"Failed to start Telegram bot: {str(e)}")
+                logger.error("Failed to start Telegram bot: %s", e)
                 logger.info("You may need to install dependencies: pip install python-telegram-bot==13.7 urllib3==1.26.15 httpx==0.23.0")
                 telegram_bot = None
         else:
@@ -142,16 +94,16 @@ def main():
         
         if args.telegram_only:
             logger.info("Running in Telegram-only mode (no terminal UI)")
-            # Just keep the main thread alive
-            import time
+            # Block the main thread until Ctrl+C or SIGTERM, without periodic wakeups
+            shutdown_event = threading.Event()
+            signal.signal(signal.SIGTERM, lambda signum, frame: shutdown_event.set())
             try:
-                while True:
-                    time.sleep(10)
+                shutdown_event.wait()
+                logger.info("Shutting down due to termination signal")
             except KeyboardInterrupt:
                 logger.info("Shutting down due to keyboard interrupt")
-                if telegram_bot:
-                    telegram_bot.stop()
-                return
+            # The finally block below stops the bot
+            return
         
         # Create and start the CLI
         terminal = ElysiumTerminalUI(api_connector, order_handler, config_manager)
@@ -180,7 +132,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("Shutting down due to keyboard interrupt")
     except Exception as e:
-        logger.error(f"Error in main: {e}", exc_info=True)
+        logger.error("Error in main: %s", e, exc_info=True)
     finally:
         # Stop the Telegram bot if it was started
         if telegram_bot:
@@ -188,7 +140,9 @@ def main():
                 telegram_bot.stop()
                 logger.info("Telegram bot stopped")
             except Exception as e:
-                logger.error(f"Error stopping Telegram bot: {str(e)}")
+                logger.error("Error stopping Telegram bot: %s", e)
+        
+        api_connector.close()
     
     logger.info("Elysium Trading Platform shutdown complete")
 
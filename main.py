@@ -1,9 +1,10 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Dict, Any, List, Optional
-import uvicorn
 import logging
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Import core modules
@@ -11,6 +12,7 @@ from core.config_manager import ConfigManager
 from core.utils import setup_logging
 from api.api_connector import ApiConnector
 from order_handler import OrderHandler
+from order_execution.grid_trading import GRID_HISTORY_FILE
 from api.spot_api import router as spot_router, set_instances as set_spot_instances
 from api.perp_api import router as perp_router, set_instances as set_perp_instances
 from api.scaled_api import router as scaled_router, set_instances as set_scaled_instances
@@ -19,11 +21,18 @@ from api.scaled_api import router as scaled_router, set_instances as set_scaled_
 logger = setup_logging("INFO")
 logger.info("Initializing Elysium Trading Platform API components")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the connector's pooled exchange connections on shutdown"""
+    yield
+    api_connector.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Elysium Trading Platform API",
     description="API for the Elysium Trading Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -38,7 +47,7 @@ app.add_middleware(
 # Initialize components
 config_manager = ConfigManager("elysium_config.json")
 api_connector = ApiConnector()
-order_handler = OrderHandler()
+order_handler = OrderHandler(grid_history_file=os.path.join(config_manager.config_dir, GRID_HISTORY_FILE))
 
 # Set instances in spot, perp, and scaled APIs
 set_spot_instances(api_connector, order_handler)
@@ -84,22 +93,30 @@ class ConnectionResponse(BaseModel):
     network: str = Field(..., description="Connected network (testnet/mainnet)")
     timestamp: str = Field(..., description="Connection timestamp")
 
+# Response models are filled straight from connector/handler dicts, so drop any extra keys
+_RESPONSE_CONFIG = ConfigDict(extra="ignore")
+
 class SpotBalance(BaseModel):
+    model_config = _RESPONSE_CONFIG
     asset: str = Field(..., description="Asset symbol (e.g., BTC)")
     available: float = Field(..., description="Available balance")
     total: float = Field(..., description="Total balance")
     in_orders: float = Field(..., description="Balance in open orders")
 
 class PerpBalance(BaseModel):
+    model_config = _RESPONSE_CONFIG
     account_value: float = Field(..., description="Total account value")
     margin_used: float = Field(..., description="Margin used for positions")
     position_value: float = Field(..., description="Total position value")
 
 class BalancesResponse(BaseModel):
+    model_config = _RESPONSE_CONFIG
     spot: List[SpotBalance] = Field(..., description="List of spot balances")
     perp: PerpBalance = Field(..., description="Perpetual trading balances")
 
 class OpenOrder(BaseModel):
+    # Handlers may report ids and timestamps as numbers; accept them for the string fields
+    model_config = ConfigDict(extra="ignore", coerce_numbers_to_str=True)
     symbol: str = Field(..., description="Trading pair symbol (e.g., BTC)")
     order_id: int = Field(..., description="Unique order ID")
     side: str = Field(..., description="Order side (buy or sell)")
@@ -114,6 +131,43 @@ class OpenOrder(BaseModel):
 class OpenOrdersResponse(BaseModel):
     orders: List[OpenOrder] = Field(..., description="List of open orders")
 
+# Values used for fields an order dict leaves out or sets to None
+_OPEN_ORDER_DEFAULTS = {
+    "symbol": "",
+    "order_id": 0,
+    "side": "",
+    "order_type": "",
+    "price": None,
+    "quantity": 0,
+    "filled": 0,
+    "remaining": 0,
+    "status": "",
+    "created_at": ""
+}
+
+def _format_open_order(order: Any) -> Optional[OpenOrder]:
+    """
+    Convert one handler order dict to an OpenOrder
+    
+    Returns:
+        The OpenOrder, or None if the order isn't a dict or can't be coerced
+    """
+    # Ensure order is a dictionary
+    if not isinstance(order, dict):
+        return None
+    try:
+        # Type coercion happens in pydantic-core; ValidationError is a ValueError
+        return OpenOrder.model_validate(
+            {
+                field: default if order.get(field) is None else order[field]
+                for field, default in _OPEN_ORDER_DEFAULTS.items()
+            }
+        )
+    except (ValueError, TypeError) as e:
+        # Log the error but continue processing other orders
+        logger.error("Error formatting order: %s", e)
+        return None
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -152,31 +206,21 @@ async def connect(request: ConnectionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/balances", response_model=BalancesResponse)
-async def get_balances():
-    """Get both spot and perpetual trading balances"""
+async def get_balances(from_cache: bool = False):
+    """
+    Get both spot and perpetual trading balances
+    
+    Args:
+        from_cache: Serve balances fetched within the last few seconds instead of querying the exchange
+    """
     try:
         if not api_connector.is_connected():
             raise HTTPException(status_code=400, detail="Not connected to exchange")
         
-        balances = api_connector.get_balances()
-        
-        spot_balances = [
-            SpotBalance(
-                asset=balance["asset"],
-                available=balance["available"],
-                total=balance["total"],
-                in_orders=balance["in_orders"]
-            )
-            for balance in balances["spot"]
-        ]
-        
-        perp_balance = PerpBalance(
-            account_value=balances["perp"]["account_value"],
-            margin_used=balances["perp"]["margin_used"],
-            position_value=balances["perp"]["position_value"]
-        )
+        balances = api_connector.get_balances(use_cache=from_cache)
         
-        return BalancesResponse(spot=spot_balances, perp=perp_balance)
+        # Validate the whole nested dict in one pydantic-core call
+        return BalancesResponse.model_validate(balances)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -216,31 +260,12 @@ async def get_open_orders(symbol: Optional[str] = None):
                 # If the response is a single order, wrap it in a list
                 orders = [response] if response else []
         
-        # Convert the orders to our Pydantic model format with safe access
-        formatted_orders = []
-        for order in orders:
-            try:
-                # Ensure order is a dictionary
-                if not isinstance(order, dict):
-                    continue
-                    
-                formatted_order = OpenOrder(
-                    symbol=str(order.get("symbol", "")),
-                    order_id=int(order.get("order_id", 0)),
-                    side=str(order.get("side", "")),
-                    order_type=str(order.get("order_type", "")),
-                    price=float(order.get("price")) if order.get("price") is not None else None,
-                    quantity=float(order.get("quantity", 0)),
-                    filled=float(order.get("filled", 0)),
-                    remaining=float(order.get("remaining", 0)),
-                    status=str(order.get("status", "")),
-                    created_at=str(order.get("created_at", ""))
-                )
-                formatted_orders.append(formatted_order)
-            except (ValueError, TypeError) as e:
-                # Log the error but continue processing other orders
-                logger.error(f"Error formatting order: {e}")
-                continue
+        # Convert the orders to our Pydantic model format, skipping any that don't fit
+        formatted_orders = [
+            formatted_order
+            for formatted_order in map(_format_open_order, orders)
+            if formatted_order is not None
+        ]
         
         return OpenOrdersResponse(orders=formatted_orders)
     except Exception as e:
@@ -255,6 +280,9 @@ if __name__ == "__main__":
         logger.info("Server will be available at http://0.0.0.0:8000")
         logger.info("API documentation available at http://0.0.0.0:8000/docs")
         
+        # Only needed when run directly; "uvicorn main:app" imports it itself
+        import uvicorn
+        
         # Run the server with more stable settings
         uvicorn.run(
             "main:app",
@@ -262,8 +290,12 @@ if __name__ == "__main__":
             port=8000,
             reload=False,  # Disable auto-reload for stability
             log_level="info",
-            workers=1  # Use single worker for stability
+            loop="auto",  # uvloop when installed (uvicorn[standard]), asyncio otherwise
+            http="auto",  # httptools when installed, h11 otherwise
+            # Must stay at one worker: the exchange connection made by /connect
+            # lives in this process, and other workers would never see it
+            workers=1
         )
     except Exception as e:
-        logger.error(f"Server crashed: {str(e)}")
+        logger.error("Server crashed: %s", e)
         raise 
\ No newline at end of file
@@ -1,9 +1,34 @@
+import functools
+import itertools
 import logging
+import os
+import queue
+import sqlite3
 import threading
-import time
 import json
+import orjson
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
+
+from core.utils import reference_price
+from order_execution.simple_orders import first_order_status
+
+# Most grid orders submitted in one signed batch request
+GRID_BATCH_SIZE = 50
+
+# Supported ways of spacing grid levels between the lower and upper price
+GRID_SPACINGS = ("linear", "log")
+
+# Stopped grids are archived to this SQLite file (kept next to the config file);
+# only the most recent few stay in memory
+GRID_HISTORY_FILE = "grids.db"
+MAX_COMPLETED_GRIDS_IN_MEMORY = 32
+
+# Fills for orders not (yet) mapped to a grid are held this many at most before being dropped
+MAX_PENDING_FILLS = 1000
 
 class GridTrading:
     """
@@ -11,24 +36,41 @@ class GridTrading:
     This approach places buy orders first, then places sell orders only after buys are filled.
     """
     
-    def __init__(self, order_handler):
+    def __init__(self, order_handler, history_file: str = GRID_HISTORY_FILE):
         """
         Initialize the grid trading module
         
         Args:
             order_handler: The order handler object to execute orders
+            history_file: SQLite file that stopped grids are archived to
         """
         self.order_handler = order_handler
         self.active_grids = {}  # Dictionary to store active grid strategies
-        self.completed_grids = {}  # Dictionary to store completed grid strategies
-        self.grid_id_counter = 1
-        self.grid_lock = threading.Lock()  # Lock for thread safety
+        self.completed_grids = OrderedDict()  # Most recently stopped grids, oldest first
+        self.history_file = history_file
+        self._history_db: Optional[sqlite3.Connection] = None
+        self._history_lock = threading.Lock()
+        # Grid IDs are a per-instance random tag plus a sequence number, unique across restarts and processes
+        self._id_tag = uuid.uuid4().hex[:8]
+        self.grid_id_counter = itertools.count(1)
+        # Guards multi-step changes (claiming, stopping, fill bookkeeping, order routing);
+        # creating grids and reading them don't take it
+        self.grid_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
+        
+        # One userFills subscription and one worker thread serve every grid;
+        # fills are routed straight to their grid and order by order ID
+        self._oid_to_order: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self._pending_fills: Dict[int, List[Dict[str, Any]]] = {}
+        self._fill_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._fill_stream_info = None
+        self._fill_subscription: Optional[Tuple[Dict[str, Any], int]] = None  # (subscription, id) on _fill_stream_info
+        self._fill_worker: Optional[threading.Thread] = None
     
     def create_grid(self, symbol: str, upper_price: float, lower_price: float, 
                     num_grids: int, total_investment: float, is_perp: bool = False, 
                     leverage: int = 1, take_profit: Optional[float] = None,
-                    stop_loss: Optional[float] = None) -> str:
+                    stop_loss: Optional[float] = None, spacing: str = "linear") -> str:
         """
         Create a new grid trading strategy
         
@@ -42,10 +84,65 @@ class GridTrading:
             leverage: Leverage to use for perpetual orders
             take_profit: Optional take profit level as percentage
             stop_loss: Optional stop loss level as percentage
+            spacing: "linear" for a fixed price step between levels, or "log" for a
+                fixed percentage step between levels
             
         Returns:
             str: Unique grid ID
         """
+        error = self._validate_grid_params(upper_price, lower_price, num_grids, spacing)
+        if error is not None:
+            return error
+        
+        grid_config = self._build_grid(symbol, upper_price, lower_price, num_grids, total_investment,
+                                       is_perp, leverage, take_profit, stop_loss, spacing)
+        grid_id = grid_config["id"]
+        
+        # next() on the counter and a single dict store are atomic, so creating a grid needs no lock
+        self.active_grids[grid_id] = grid_config
+        self.logger.info("Created grid trading strategy %s for %s", grid_id, symbol)
+        
+        return grid_id
+    
+    def launch_grid(self, symbol: str, upper_price: float, lower_price: float, 
+                    num_grids: int, total_investment: float, is_perp: bool = False, 
+                    leverage: int = 1, take_profit: Optional[float] = None,
+                    stop_loss: Optional[float] = None, spacing: str = "linear") -> Dict[str, Any]:
+        """
+        Create a grid trading strategy and start it straight away
+        
+        Same as create_grid followed by start_grid, but the grid is registered
+        already claimed for starting, so it skips the separate start checks.
+        
+        Args:
+            Same as create_grid
+            
+        Returns:
+            Dict: start_grid status information, plus the new grid_id
+        """
+        error = self._validate_grid_params(upper_price, lower_price, num_grids, spacing)
+        if error is not None:
+            return error
+        
+        grid = self._build_grid(symbol, upper_price, lower_price, num_grids, total_investment,
+                                is_perp, leverage, take_profit, stop_loss, spacing)
+        grid_id = grid["id"]
+        grid["status"] = "starting"
+        self.active_grids[grid_id] = grid
+        self.logger.info("Created grid trading strategy %s for %s", grid_id, symbol)
+        
+        result = self._run_start(grid_id, grid)
+        result["grid_id"] = grid_id
+        return result
+    
+    def _validate_grid_params(self, upper_price: float, lower_price: float, num_grids: int,
+                              spacing: str) -> Optional[Dict[str, Any]]:
+        """
+        Check grid parameters before a grid is built
+        
+        Returns:
+            Error dict if the parameters are invalid, None otherwise
+        """
         if upper_price <= lower_price:
             self.logger.error("Upper price must be greater than lower price")
             return {"status": "error", "message": "Upper price must be greater than lower price"}
@@ -54,42 +151,62 @@ class GridTrading:
             self.logger.error("Number of grids must be at least 2")
             return {"status": "error", "message": "Number of grids must be at least 2"}
         
-        with self.grid_lock:
-            grid_id = f"grid_{datetime.now().strftime('%Y%m%d%H%M%S')}_{self.grid_id_counter}"
-            self.grid_id_counter += 1
-            
-            # Calculate grid parameters
-            price_interval = (upper_price - lower_price) / (num_grids - 1)
-            investment_per_grid = total_investment / num_grids
-            
-            grid_config = {
-                "id": grid_id,
-                "symbol": symbol,
-                "upper_price": upper_price,
-                "lower_price": lower_price,
-                "num_grids": num_grids,
-                "price_interval": price_interval,
-                "total_investment": total_investment,
-                "investment_per_grid": investment_per_grid,
-                "is_perp": is_perp,
-                "leverage": leverage,
-                "take_profit": take_profit,
-                "stop_loss": stop_loss,
-                "created_at": datetime.now(),
-                "active": False,
-                "orders": [],
-                "filled_orders": [],
-                "profit_loss": 0,
-                "status": "created",
-                "error": None,
-                "current_price": None,
-                "buy_only_mode": True  # New flag to indicate we're only placing buy orders initially
-            }
-            
-            self.active_grids[grid_id] = grid_config
-            self.logger.info(f"Created grid trading strategy {grid_id} for {symbol}")
-            
-            return grid_id
+        if spacing not in GRID_SPACINGS:
+            self.logger.error("Unknown grid spacing: %s", spacing)
+            return {"status": "error", "message": f"Grid spacing must be one of {', '.join(GRID_SPACINGS)}"}
+        
+        if spacing == "log" and lower_price <= 0:
+            self.logger.error("Lower price must be positive for log spacing")
+            return {"status": "error", "message": "Lower price must be positive for log spacing"}
+        
+        return None
+    
+    def _build_grid(self, symbol: str, upper_price: float, lower_price: float, num_grids: int,
+                    total_investment: float, is_perp: bool, leverage: int, take_profit: Optional[float],
+                    stop_loss: Optional[float], spacing: str) -> Dict[str, Any]:
+        """Build the config of a new grid with a fresh ID and its price levels (not yet registered)"""
+        grid_id = f"grid_{self._id_tag}_{next(self.grid_id_counter)}"
+        
+        # Calculate grid parameters; log grids step by a constant ratio instead of a constant amount
+        price_interval = (upper_price - lower_price) / (num_grids - 1)
+        price_ratio = (upper_price / lower_price) ** (1 / (num_grids - 1)) if spacing == "log" else None
+        investment_per_grid = total_investment / num_grids
+        # Ascending price of every level, computed once for start_grid and fill handling
+        if spacing == "log":
+            grid_levels = [lower_price * price_ratio ** i for i in range(num_grids)]
+        else:
+            grid_levels = [lower_price + i * price_interval for i in range(num_grids)]
+        # Pin the top level so rounding in the step doesn't push it past upper_price
+        grid_levels[-1] = upper_price
+        
+        grid_config = {
+            "id": grid_id,
+            "symbol": symbol,
+            "upper_price": upper_price,
+            "lower_price": lower_price,
+            "num_grids": num_grids,
+            "spacing": spacing,
+            "price_interval": price_interval,
+            "price_ratio": price_ratio,
+            "grid_levels": grid_levels,
+            "total_investment": total_investment,
+            "investment_per_grid": investment_per_grid,
+            "is_perp": is_perp,
+            "leverage": leverage,
+            "take_profit": take_profit,
+            "stop_loss": stop_loss,
+            "created_at": datetime.now(),
+            "active": False,
+            "orders": [],
+            "filled_orders": [],
+            "profit_loss": 0,
+            "status": "created",
+            "error": None,
+            "current_price": None,
+            "buy_only_mode": True  # New flag to indicate we're only placing buy orders initially
+        }
+        
+        return grid_config
     
     def start_grid(self, grid_id: str) -> Dict[str, Any]:
         """
@@ -103,146 +220,325 @@ class GridTrading:
         """
         with self.grid_lock:
             if grid_id not in self.active_grids:
-                self.logger.error(f"Grid {grid_id} not found")
+                self.logger.error("Grid %s not found", grid_id)
                 return {"status": "error", "message": f"Grid {grid_id} not found"}
             
             grid = self.active_grids[grid_id]
             
             if grid["active"]:
-                self.logger.warning(f"Grid {grid_id} is already active")
+                self.logger.warning("Grid %s is already active", grid_id)
                 return {"status": "warning", "message": f"Grid {grid_id} is already active"}
             
-            try:
-                warning_msg = None
-                
-                # Verify API connector is properly set
-                if not hasattr(self.order_handler, 'api_connector') or self.order_handler.api_connector is None:
-                    self.logger.error(f"API connector not properly set for grid {grid_id}")
-                    return {"status": "error", "message": "API connector not properly set. Please reconnect to the exchange."}
-                    
-                # Get market data with proper error handling
-                self.logger.info(f"Retrieving market data for {grid['symbol']}")
-                market_data = self.order_handler.api_connector.get_market_data(grid["symbol"])
-                
-                # Check for error in market data
-                if "error" in market_data:
-                    self.logger.error(f"Error getting market data: {market_data['error']}")
-                    grid["error"] = f"Could not get current price: {market_data['error']}"
-                    return {"status": "error", "message": f"Could not get current price for {grid['symbol']}: {market_data['error']}"}
+            if grid["status"] == "starting":
+                self.logger.warning("Grid %s is already starting", grid_id)
+                return {"status": "warning", "message": f"Grid {grid_id} is already starting"}
+            
+            # Claim the grid so a concurrent start or stop backs off
+            grid["status"] = "starting"
+        
+        return self._run_start(grid_id, grid)
+    
+    def _run_start(self, grid_id: str, grid: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Price the grid and place its buy orders (the grid must already be claimed as "starting")
+        
+        Runs without grid_lock, reading only config fields that don't change after
+        the grid is built; the final update takes the lock.
+        
+        Returns:
+            Dict: Status information
+        """
+        try:
+            warning_msg = None
+            
+            # Verify API connector is properly set
+            if not hasattr(self.order_handler, 'api_connector') or self.order_handler.api_connector is None:
+                self.logger.error("API connector not properly set for grid %s", grid_id)
+                self._abort_start(grid)
+                return {"status": "error", "message": "API connector not properly set. Please reconnect to the exchange."}
                 
-                # Get current price from market data
-                current_price = market_data.get("mid_price")
+            # Get market data with proper error handling
+            self.logger.info("Retrieving market data for %s", grid["symbol"])
+            market_data = self.order_handler.api_connector.get_market_data(grid["symbol"])
+            
+            # Check for error in market data
+            if "error" in market_data:
+                self.logger.error("Error getting market data: %s", market_data["error"])
+                self._abort_start(grid, f"Could not get current price: {market_data['error']}")
+                return {"status": "error", "message": f"Could not get current price for {grid['symbol']}: {market_data['error']}"}
+            
+            # Get current price from market data, falling back to the book when there's no mid
+            current_price, price_source = reference_price(market_data)
+            
+            if current_price is None:
+                self.logger.error("Could not determine current price for %s", grid["symbol"])
+                self._abort_start(grid, "Could not determine current price")
+                return {"status": "error", "message": f"Could not determine current price for {grid['symbol']}"}
+            
+            if price_source != "mid_price":
+                self.logger.info("Using %s as current price: %s", price_source, current_price)
+            
+            self.logger.info("Current price for %s: %s", grid["symbol"], current_price)
+            
+            # Check if current price is within grid range
+            if current_price < grid["lower_price"] or current_price > grid["upper_price"]:
+                self.logger.warning("Current price (%s) is outside grid range (%s - %s)",
+                                    current_price, grid["lower_price"], grid["upper_price"])
+                warning_msg = f"Current price ({current_price}) is outside grid range. Consider adjusting grid boundaries."
+            
+            # Place only buy orders (below current price); levels are sorted, so that's a prefix
+            grid_levels = grid["grid_levels"]
+            buy_levels = grid_levels[:bisect_left(grid_levels, current_price)]
+            buy_orders = []
+            
+            # Use a simple fixed size to start
+            base_quantity = 1.0
+            
+            # Make sure fills for the new orders will be seen before placing any
+            self._ensure_fill_stream()
+            
+            if buy_levels and grid["is_perp"]:
+                # Set leverage once for the whole grid rather than per order
+                self.order_handler._ensure_leverage(grid["symbol"], grid["leverage"])
+            
+            # Submit the buy orders as signed batches instead of one request per level
+            for start in range(0, len(buy_levels), GRID_BATCH_SIZE):
+                batch_levels = buy_levels[start:start + GRID_BATCH_SIZE]
+                self.logger.info("Placing %d buy orders for %s from %s to %s",
+                                 len(batch_levels), grid["symbol"], batch_levels[0], batch_levels[-1])
+                batch_result = self.order_handler.batch_place([
+                    {"symbol": grid["symbol"], "is_buy": True, "size": base_quantity, "price": price}
+                    for price in batch_levels
+                ])
                 
-                if not current_price:
-                    # Try to use best_bid and best_ask if mid_price is not available
-                    best_bid = market_data.get("best_bid")
-                    best_ask = market_data.get("best_ask")
-                    
-                    if best_bid and best_ask:
-                        current_price = (best_bid + best_ask) / 2
-                        self.logger.info(f"Using average of bid/ask as current price: {current_price}")
-                    elif best_bid:
-                        current_price = best_bid
-                        self.logger.info(f"Using best bid as current price: {current_price}")
-                    elif best_ask:
-                        current_price = best_ask
-                        self.logger.info(f"Using best ask as current price: {current_price}")
-                    else:
-                        self.logger.error(f"Could not determine current price for {grid['symbol']}")
-                        grid["error"] = "Could not determine current price"
-                        return {"status": "error", "message": f"Could not determine current price for {grid['symbol']}"}
+                if "results" not in batch_result:
+                    self.logger.error("Failed to place buy orders: %s", batch_result.get("message"))
+                    continue
                 
-                self.logger.info(f"Current price for {grid['symbol']}: {current_price}")
+                # Results come back in the same order as the submitted levels
+                for price, order_result in zip(batch_levels, batch_result["results"]):
+                    status = first_order_status(order_result)
+                    if status.error is not None:
+                        self.logger.error("Error placing buy order at %s: %s", price, status.error)
+                        continue
+                    if status.state == "open":
+                        buy_orders.append({
+                            "id": status.oid,
+                            "price": price,
+                            "quantity": base_quantity,
+                            "side": "buy",
+                            "status": "open"
+                        })
+                        self.logger.debug("Successfully placed buy order at %s", price)
+            
+            # Update grid with orders
+            with self.grid_lock:
                 grid["current_price"] = current_price
-                
-                # Check if current price is within grid range
-                if current_price < grid["lower_price"] or current_price > grid["upper_price"]:
-                    self.logger.warning(f"Current price ({current_price}) is outside grid range ({grid['lower_price']} - {grid['upper_price']})")
-                    warning_msg = f"Current price ({current_price}) is outside grid range. Consider adjusting grid boundaries."
-                
-                # Calculate grid levels
-                grid_levels = []
-                for i in range(grid["num_grids"]):
-                    price = grid["lower_price"] + (i * grid["price_interval"])
-                    grid_levels.append(price)
-                
-                # Place only buy orders (below current price)
-                buy_orders = []
-                
-                # Use a simple fixed size to start
-                base_quantity = 1.0
-                
-                # Place only buy orders below current price
-                for price in grid_levels:
-                    if price < current_price:
-                        try:
-                            # Place a buy order
-                            self.logger.info(f"Placing buy order at {price} for {grid['symbol']}")
-                            
-                            # Try to use a simple fixed size that won't cause precision issues
-                            if grid["is_perp"]:
-                                # Set leverage first
-                                self.order_handler._set_leverage(grid["symbol"], grid["leverage"])
-                                order_result = self.order_handler.perp_limit_buy(
-                                    grid["symbol"], base_quantity, price, grid["leverage"]
-                                )
-                            else:
-                                order_result = self.order_handler.limit_buy(
-                                    grid["symbol"], base_quantity, price
-                                )
-                            
-                            # Process the result
-                            if order_result["status"] == "ok":
-                                if "response" in order_result and "data" in order_result["response"] and "statuses" in order_result["response"]["data"]:
-                                    status = order_result["response"]["data"]["statuses"][0]
-                                    if "resting" in status:
-                                        order_id = status["resting"]["oid"]
-                                        buy_orders.append({
-                                            "id": order_id,
-                                            "price": price,
-                                            "quantity": base_quantity,
-                                            "side": "buy",
-                                            "status": "open"
-                                        })
-                                        self.logger.info(f"Successfully placed buy order at {price}")
-                                    elif "error" in status:
-                                        self.logger.error(f"Error placing buy order at {price}: {status['error']}")
-                            else:
-                                self.logger.error(f"Failed to place buy order at {price}: {order_result}")
-                            
-                            # Add a delay between orders to avoid rate limiting
-                            time.sleep(0.5)
-                            
-                        except Exception as e:
-                            self.logger.error(f"Exception placing buy order at {price}: {str(e)}")
-                
-                # Update grid with orders
                 grid["orders"] = buy_orders
                 grid["active"] = True
                 grid["status"] = "active"
                 grid["buy_only_mode"] = True  # We're only placing buy orders initially
-                
-                self.logger.info(f"Started grid {grid_id} with {len(buy_orders)} buy orders")
-                
-                # Start monitoring thread for this grid
-                monitor_thread = threading.Thread(target=self._monitor_grid, args=(grid_id,))
-                monitor_thread.daemon = True
-                monitor_thread.start()
-                
-                return {
-                    "status": "ok", 
-                    "message": f"Grid {grid_id} started successfully in buy-only mode",
-                    "warning": warning_msg,
-                    "buy_orders": len(buy_orders),
-                    "sell_orders": 0,  # No sell orders yet
-                    "current_price": current_price
-                }
+                self._register_orders(grid_id, buy_orders)
+            
+            self.logger.info("Started grid %s with %d buy orders", grid_id, len(buy_orders))
+            
+            return {
+                "status": "ok", 
+                "message": f"Grid {grid_id} started successfully in buy-only mode",
+                "warning": warning_msg,
+                "buy_orders": len(buy_orders),
+                "sell_orders": 0,  # No sell orders yet
+                "current_price": current_price
+            }
+        except Exception as e:
+            error_msg = f"Error starting grid {grid_id}: {str(e)}"
+            self.logger.error(error_msg)
+            self._abort_start(grid, error_msg, "error")
+            return {"status": "error", "message": error_msg}
+    
+    def _abort_start(self, grid: Dict[str, Any], error: Optional[str] = None, status: str = "created") -> None:
+        """
+        Release a grid claimed by start_grid after it failed to start
+        
+        Args:
+            grid: The grid config being started
+            error: Error to record on the grid, if any
+            status: Status to leave the grid in
+        """
+        with self.grid_lock:
+            if error is not None:
+                grid["error"] = error
+            grid["status"] = status
+    
+    def _register_orders(self, grid_id: str, orders: List[Dict[str, Any]]) -> None:
+        """
+        Route fills for the given orders to a grid (caller holds grid_lock)
+        
+        Fills that arrived before the order IDs were known are replayed.
+        """
+        for order in orders:
+            self._oid_to_order[order["id"]] = (grid_id, order)
+            for fill in self._pending_fills.pop(order["id"], ()):
+                self._fill_queue.put({"data": {"fills": [fill]}})
+    
+    def _ensure_fill_stream(self) -> None:
+        """Subscribe to the wallet's userFills stream once per connection and start the fill worker"""
+        connector = self.order_handler.api_connector
+        info = connector.info
+        with self.grid_lock:
+            if info is None or info is self._fill_stream_info:
+                return
+            previous_info, previous_subscription = self._fill_stream_info, self._fill_subscription
+            self._fill_stream_info = info
+            self._fill_subscription = None
+            if self._fill_worker is None:
+                self._fill_worker = threading.Thread(target=self._process_fills, daemon=True)
+                self._fill_worker.start()
+        
+        # The connection changed: stop the previous wallet's fills from reaching the queue
+        if previous_info is not None and previous_subscription is not None:
+            try:
+                previous_info.unsubscribe(*previous_subscription)
             except Exception as e:
-                error_msg = f"Error starting grid {grid_id}: {str(e)}"
-                self.logger.error(error_msg)
-                grid["error"] = error_msg
-                grid["status"] = "error"
-                return {"status": "error", "message": error_msg}
+                self.logger.debug("Could not unsubscribe previous fill stream: %s", e)
+        
+        try:
+            # The WebSocket thread only enqueues; order placement happens on the fill worker
+            subscription = {"type": "userFills", "user": connector.wallet_address}
+            subscription_id = info.subscribe(subscription, functools.partial(self._enqueue_fills, source=info))
+            with self.grid_lock:
+                self._fill_subscription = (subscription, subscription_id)
+        except Exception as e:
+            self.logger.warning("Could not subscribe to fills, grids won't react to fills: %s", e)
+            with self.grid_lock:
+                self._fill_stream_info = None
+    
+    def refresh_fill_stream(self) -> None:
+        """
+        Move the userFills subscription to the connector's current Info
+        
+        Called when the connection changes; a replaced Info's WebSocket is closed, so running
+        grids would otherwise stop reacting to fills until another grid was started.
+        """
+        if self.order_handler.api_connector is None:
+            return
+        if any(grid["active"] for grid in list(self.active_grids.values())):
+            self._ensure_fill_stream()
+    
+    def _enqueue_fills(self, message: Dict[str, Any], source=None) -> None:
+        """Queue a userFills message for the fill worker, unless it comes from a replaced Info"""
+        if source is self._fill_stream_info:
+            self._fill_queue.put(message)
+    
+    def _process_fills(self) -> None:
+        """Fill worker: apply userFills messages to the grids that own the filled orders"""
+        while True:
+            message = self._fill_queue.get()
+            data = message.get("data") or {}
+            # The first message replays recent history, which predates any grid order
+            if data.get("isSnapshot"):
+                continue
+            for fill in data.get("fills", []):
+                try:
+                    self._handle_fill(fill)
+                except Exception as e:
+                    self.logger.error("Error handling fill for order %s: %s", fill.get("oid"), e)
+    
+    def _handle_fill(self, fill: Dict[str, Any]) -> None:
+        """
+        Record a fill and, once its order is complete, place the opposite grid order
+        
+        A filled buy is followed by a sell one grid level higher; a filled sell books
+        the profit and puts the buy back at its original level.
+        """
+        oid = fill["oid"]
+        with self.grid_lock:
+            routed = self._oid_to_order.get(oid)
+            if routed is None:
+                # Possibly a grid order whose placement hasn't been registered yet
+                if oid not in self._pending_fills and len(self._pending_fills) >= MAX_PENDING_FILLS:
+                    # Drop the oldest unclaimed order rather than fills that may be about to register
+                    self._pending_fills.pop(next(iter(self._pending_fills)))
+                self._pending_fills.setdefault(oid, []).append(fill)
+                return
+            
+            grid_id, order = routed
+            grid = self.active_grids.get(grid_id)
+            if grid is None or order["status"] != "open":
+                return
+            
+            order["filled_quantity"] = order.get("filled_quantity", 0) + float(fill["sz"])
+            if order["filled_quantity"] < order["quantity"] * (1 - 1e-9):
+                return
+            
+            order["status"] = "filled"
+            del self._oid_to_order[oid]
+            grid["filled_orders"].append(order)
+            
+            if order["side"] == "buy":
+                is_buy = False
+                buy_price = order["price"]
+                price = self._next_level(grid, buy_price)
+                grid["buy_only_mode"] = False
+            else:
+                is_buy = True
+                buy_price = order["buy_price"]
+                price = buy_price
+                grid["profit_loss"] += (order["price"] - buy_price) * order["quantity"]
+            quantity = order["quantity"]
+        
+        self.logger.info("Grid %s %s order %s filled at %s", grid_id, order["side"], oid, order["price"])
+        new_oid = self._place_grid_order(grid, is_buy, quantity, price)
+        if new_oid is None:
+            return
+        
+        new_order = {
+            "id": new_oid,
+            "price": price,
+            "quantity": quantity,
+            "side": "buy" if is_buy else "sell",
+            "status": "open",
+            "buy_price": buy_price
+        }
+        with self.grid_lock:
+            if grid_id in self.active_grids:
+                grid["orders"].append(new_order)
+                self._register_orders(grid_id, [new_order])
+                return
+        
+        # The grid was stopped while the order was being placed
+        self.order_handler.cancel_order(grid["symbol"], new_oid)
+    
+    def _next_level(self, grid: Dict[str, Any], price: float) -> float:
+        """Price of the grid level above the given level price"""
+        grid_levels = grid["grid_levels"]
+        index = bisect_right(grid_levels, price)
+        if index < len(grid_levels):
+            return grid_levels[index]
+        if grid["spacing"] == "log":
+            return price * grid["price_ratio"]
+        return price + grid["price_interval"]
+    
+    def _place_grid_order(self, grid: Dict[str, Any], is_buy: bool, quantity: float, price: float) -> Optional[int]:
+        """
+        Place a single resting limit order for a grid
+        
+        Returns:
+            The order ID, or None if the order isn't resting on the book
+        """
+        symbol = grid["symbol"]
+        if grid["is_perp"]:
+            place = self.order_handler.perp_limit_buy if is_buy else self.order_handler.perp_limit_sell
+            result = place(symbol, quantity, price, grid["leverage"])
+        else:
+            place = self.order_handler.limit_buy if is_buy else self.order_handler.limit_sell
+            result = place(symbol, quantity, price)
+        
+        status = first_order_status(result)
+        if status.state == "open":
+            return status.oid
+        self.logger.error("Failed to place grid %s order at %s: %s", "buy" if is_buy else "sell", price, result)
+        return None
     
     def stop_grid(self, grid_id: str) -> Dict[str, Any]:
         """
@@ -256,42 +552,52 @@ class GridTrading:
         """
         with self.grid_lock:
             if grid_id not in self.active_grids:
-                self.logger.error(f"Grid {grid_id} not found")
+                self.logger.error("Grid %s not found", grid_id)
                 return {"status": "error", "message": f"Grid {grid_id} not found"}
             
             grid = self.active_grids[grid_id]
             
             if not grid["active"]:
-                self.logger.warning(f"Grid {grid_id} is not active")
+                self.logger.warning("Grid %s is not active", grid_id)
                 return {"status": "warning", "message": f"Grid {grid_id} is not active"}
             
-            # Cancel all open orders
+            # Deactivate now so a concurrent stop sees it, and snapshot the open orders
+            grid["active"] = False
+            grid["status"] = "stopping"
+            symbol = grid["symbol"]
+            open_orders = [order for order in grid["orders"] if order["status"] == "open"]
+        
+        # Cancel all open orders in one request, without holding the lock over the network call
+        try:
+            cancel_results = {}
+            if open_orders:
+                result = self.order_handler.batch_cancel(symbol, [order["id"] for order in open_orders])
+                if "results" in result:
+                    cancel_results = {r["order_id"]: r["status"] for r in result["results"]}
+                else:
+                    self.logger.error("Error cancelling orders for grid %s: %s", grid_id, result.get("message"))
+        except Exception as e:
+            self.logger.error("Error cancelling orders for grid %s: %s", grid_id, e)
+        
+        with self.grid_lock:
             try:
-                symbol = grid["symbol"]
                 cancelled = 0
-                
-                # Get all open orders for this grid
-                open_orders = [order for order in grid["orders"] if order["status"] == "open"]
-                
                 for order in open_orders:
-                    try:
-                        result = self.order_handler.cancel_order(symbol, order["id"])
-                        if result["status"] == "ok":
-                            order["status"] = "cancelled"
-                            cancelled += 1
-                    except Exception as e:
-                        self.logger.error(f"Error cancelling order {order['id']}: {str(e)}")
+                    if cancel_results.get(order["id"]) == "ok":
+                        order["status"] = "cancelled"
+                        cancelled += 1
                 
-                grid["active"] = False
                 grid["status"] = "stopped"
+                for order in grid["orders"]:
+                    self._oid_to_order.pop(order["id"], None)
                 
                 # Move to completed grids
                 self.completed_grids[grid_id] = grid
-                del self.active_grids[grid_id]
+                self.active_grids.pop(grid_id, None)
                 
-                self.logger.info(f"Stopped grid {grid_id}, cancelled {cancelled}/{len(open_orders)} orders")
+                self.logger.info("Stopped grid %s, cancelled %d/%d orders", grid_id, cancelled, len(open_orders))
                 
-                return {
+                result = {
                     "status": "ok", 
                     "message": f"Grid {grid_id} stopped successfully",
                     "cancelled_orders": cancelled,
@@ -304,6 +610,9 @@ class GridTrading:
                 self.logger.error(error_msg)
                 grid["error"] = error_msg
                 return {"status": "error", "message": error_msg}
+        
+        self._archive_grid(grid)
+        return result
     
     def get_grid_status(self, grid_id: str) -> Dict[str, Any]:
         """
@@ -315,33 +624,188 @@ class GridTrading:
         Returns:
             Dict: Grid status information
         """
+        grid, is_completed = self._find_grid(grid_id)
+        if grid is None:
+            self.logger.error("Grid %s not found", grid_id)
+            return {"status": "error", "message": f"Grid {grid_id} not found"}
+        
+        status = grid.copy()
+        status["status"] = self._display_status(grid, is_completed)
+        return status
+    
+    def get_grid_summary(self, grid_id: str) -> Dict[str, Any]:
+        """
+        Get a grid's headline figures without copying its order lists
+        
+        Args:
+            grid_id: The ID of the grid
+            
+        Returns:
+            Dict: Scalar grid fields plus order counts
+        """
+        grid, is_completed = self._find_grid(grid_id)
+        if grid is None:
+            self.logger.error("Grid %s not found", grid_id)
+            return {"status": "error", "message": f"Grid {grid_id} not found"}
+        
+        return {
+            "id": grid["id"],
+            "symbol": grid["symbol"],
+            "status": self._display_status(grid, is_completed),
+            "active": grid["active"],
+            "num_orders": len(grid["orders"]),
+            "num_filled": len(grid["filled_orders"]),
+            "profit_loss": grid["profit_loss"],
+            "current_price": grid["current_price"],
+            "error": grid["error"]
+        }
+    
+    def get_grid_orders(self, grid_id: str, offset: int = 0, limit: int = 50,
+                        filled: bool = False) -> Dict[str, Any]:
+        """
+        Get one page of a grid's orders
+        
+        Args:
+            grid_id: The ID of the grid
+            offset: Index of the first order to return
+            limit: Maximum number of orders to return
+            filled: Page through filled orders instead of all placed orders
+            
+        Returns:
+            Dict: The page of orders and the total number available
+        """
+        grid, _ = self._find_grid(grid_id)
+        if grid is None:
+            self.logger.error("Grid %s not found", grid_id)
+            return {"status": "error", "message": f"Grid {grid_id} not found"}
+        
+        orders = grid["filled_orders" if filled else "orders"]
+        return {
+            "id": grid_id,
+            "total": len(orders),
+            "offset": offset,
+            "orders": orders[offset:offset + limit]
+        }
+    
+    def _find_grid(self, grid_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Look up a grid without taking grid_lock
+        
+        Single dict lookups are atomic, and stop_grid adds a grid to completed_grids
+        before removing it from active_grids, so one of the two always finds it.
+        
+        Returns:
+            Tuple of (grid or None, whether it's a completed grid)
+        """
+        grid = self.active_grids.get(grid_id)
+        if grid is not None:
+            return grid, False
+        grid = self.completed_grids.get(grid_id)
+        if grid is None:
+            grid = self._load_archived_grid(grid_id)
+        return grid, True
+    
+    def _history(self, create: bool = True) -> Optional[sqlite3.Connection]:
+        """
+        Open the grid history database on first use (caller holds _history_lock)
+        
+        Args:
+            create: Create the file if it doesn't exist yet; readers pass False so that
+                looking up or listing grids never leaves an empty database behind
+                
+        Returns:
+            The connection, or None if create is False and nothing has been archived yet
+        """
+        if self._history_db is None:
+            if not create and not os.path.exists(self.history_file):
+                return None
+            self._history_db = sqlite3.connect(self.history_file, check_same_thread=False)
+            self._history_db.execute(
+                "CREATE TABLE IF NOT EXISTS completed_grids "
+                "(id TEXT PRIMARY KEY, stopped_at TEXT NOT NULL, grid BLOB NOT NULL)"
+            )
+        return self._history_db
+    
+    def _archive_grid(self, grid: Dict[str, Any]) -> None:
+        """
+        Write a stopped grid to the history database, then trim the in-memory completed grids
+        
+        Grids are only evicted from memory once archived, so a failed write keeps them available.
+        """
+        try:
+            blob = orjson.dumps(grid, default=str)
+            with self._history_lock:
+                db = self._history()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO completed_grids (id, stopped_at, grid) VALUES (?, ?, ?)",
+                        (grid["id"], datetime.now().isoformat(), blob)
+                    )
+        except Exception as e:
+            self.logger.error("Error archiving grid %s: %s", grid["id"], e)
+            return
+        
         with self.grid_lock:
-            if grid_id in self.active_grids:
-                grid = self.active_grids[grid_id]
-                status = grid.copy()
-                status["status"] = "active" if grid["active"] else "created"
-                return status
-            elif grid_id in self.completed_grids:
-                grid = self.completed_grids[grid_id]
-                status = grid.copy()
-                status["status"] = "completed"
-                return status
-            else:
-                self.logger.error(f"Grid {grid_id} not found")
-                return {"status": "error", "message": f"Grid {grid_id} not found"}
+            while len(self.completed_grids) > MAX_COMPLETED_GRIDS_IN_MEMORY:
+                self.completed_grids.popitem(last=False)
+    
+    def _load_archived_grid(self, grid_id: str) -> Optional[Dict[str, Any]]:
+        """Read a stopped grid back from the history database"""
+        try:
+            with self._history_lock:
+                db = self._history(create=False)
+                if db is None:
+                    return None
+                row = db.execute(
+                    "SELECT grid FROM completed_grids WHERE id = ?", (grid_id,)
+                ).fetchone()
+        except Exception as e:
+            self.logger.error("Error reading archived grid %s: %s", grid_id, e)
+            return None
+        return orjson.loads(row[0]) if row else None
     
-    def list_grids(self) -> Dict[str, List[Dict[str, Any]]]:
+    def _count_archived_grids(self, in_memory: List[str]) -> int:
+        """
+        Number of archived grids that are no longer held in memory
+        
+        Args:
+            in_memory: IDs of the completed grids still listed in full
+        """
+        try:
+            with self._history_lock:
+                db = self._history(create=False)
+                if db is None:
+                    return 0
+                placeholders = ", ".join("?" * len(in_memory))
+                return db.execute(
+                    f"SELECT COUNT(*) FROM completed_grids WHERE id NOT IN ({placeholders})", in_memory
+                ).fetchone()[0]
+        except Exception as e:
+            self.logger.error("Error counting archived grids: %s", e)
+            return 0
+    
+    def _display_status(self, grid: Dict[str, Any], is_completed: bool) -> str:
+        """Status reported to callers: completed, active or created"""
+        if is_completed:
+            return "completed"
+        return "active" if grid["active"] else "created"
+    
+    def list_grids(self) -> Dict[str, Any]:
         """
         List all grid trading strategies
         
+        Only recently stopped grids are listed in full; older ones are counted in
+        archived_count and can still be fetched by ID.
+        
         Returns:
             Dict: Dictionary with active and completed grids
         """
-        with self.grid_lock:
-            active = list(self.active_grids.values())
-            completed = list(self.completed_grids.values())
-            
-            return {
-                "active": active,
-                "completed": completed
-            }
\ No newline at end of file
+        # Snapshotting a dict's values is atomic, so listing doesn't contend with fill handling
+        active = list(self.active_grids.values())
+        completed = list(self.completed_grids.values())
+        
+        return {
+            "active": active,
+            "completed": completed,
+            "archived_count": self._count_archived_grids([grid["id"] for grid in completed])
+        }
\ No newline at end of file
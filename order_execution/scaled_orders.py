@@ -1,7 +1,9 @@
 import logging
-import time
+from math import floor, log10
 from typing import Dict, List, Any, Optional
 
+from api.constants import MIN_ORDER_VALUE
+
 class ScaledOrderExecutor:
     """
     Handles scaled order execution for Elysium Trading Platform
@@ -12,14 +14,18 @@ class ScaledOrderExecutor:
         self.exchange = exchange
         self.info = info
         self.api_connector = api_connector
+        self.order_handler = None  # Set by OrderHandler; used to submit orders in one batch
         self.wallet_address = None
         self.logger = logging.getLogger(__name__)
+        # Size decimals per perp symbol, filled from one meta() call on first use
+        self._sz_decimals_cache: Dict[str, int] = {}
     
     def set_exchange(self, exchange, info, api_connector=None):
         """Set the exchange and info objects"""
         self.exchange = exchange
         self.info = info
         self.api_connector = api_connector
+        self._sz_decimals_cache.clear()
     
     def _calculate_order_distribution(self, total_size: float, num_orders: int, skew: float) -> List[float]:
         """
@@ -42,10 +48,10 @@ class ScaledOrderExecutor:
             
         # Exponential distribution based on skew
         # Higher skew = more weight on earlier orders
-        weights = [pow(i+1, skew) for i in range(num_orders)]
-        total_weight = sum(weights)
+        weights = [(i + 1) ** skew for i in range(num_orders)]
+        scale = total_size / sum(weights)
         
-        return [total_size * (weight / total_weight) for weight in weights]
+        return [weight * scale for weight in weights]
     
     def _calculate_price_levels(self, is_buy: bool, num_orders: int, start_price: float, end_price: float) -> List[float]:
         """
@@ -66,13 +72,7 @@ class ScaledOrderExecutor:
         # Calculate step size
         step = (end_price - start_price) / (num_orders - 1)
         
-        # Generate prices
-        prices = []
-        for i in range(num_orders):
-            price = start_price + step * i
-            prices.append(price)
-        
-        return prices
+        return [start_price + step * i for i in range(num_orders)]
     
     def _format_size(self, symbol: str, size: float) -> float:
         """
@@ -86,28 +86,33 @@ class ScaledOrderExecutor:
             Properly formatted size
         """
         try:
-            # Get the metadata for the symbol
-            meta = self.info.meta()
-            
-            # Find the symbol's info
-            symbol_info = None
-            for asset_info in meta["universe"]:
-                if asset_info["name"] == symbol:
-                    symbol_info = asset_info
-                    break
-                
-            if symbol_info:
-                # Format size based on symbol's decimal places
-                sz_decimals = symbol_info.get("szDecimals", 2)
-                return round(size, sz_decimals)
-            
-            # Default to 2 decimal places if symbol info not found
-            return round(size, 2)
-            
+            return round(size, self._get_sz_decimals(symbol))
         except Exception as e:
             self.logger.warning(f"Error formatting size: {str(e)}. Using original size.")
             return size
     
+    def _get_sz_decimals(self, symbol: str) -> int:
+        """
+        Get the size decimal places for a symbol
+        
+        The whole universe is cached from a single meta() call, so later lookups
+        for any symbol are a dict hit.
+        
+        Args:
+            symbol: Trading pair symbol
+            
+        Returns:
+            The symbol's szDecimals, or 2 if the symbol isn't in the perp universe
+        """
+        if symbol not in self._sz_decimals_cache:
+            meta = self.info.meta()
+            self._sz_decimals_cache.update(
+                {asset_info["name"]: asset_info.get("szDecimals", 2) for asset_info in meta["universe"]}
+            )
+            # Remember misses too, so spot symbols don't refetch meta() on every call
+            self._sz_decimals_cache.setdefault(symbol, 2)
+        return self._sz_decimals_cache[symbol]
+    
     def _format_price(self, symbol: str, price: float) -> float:
         """
         Format the price according to exchange requirements
@@ -120,30 +125,103 @@ class ScaledOrderExecutor:
             Properly formatted price
         """
         try:
-            # Special handling for very large prices to avoid precision errors
-            if price > 100_000:
-                return round(price)
-                
-            # First round to 5 significant figures
-            price_str = f"{price:.5g}"
-            price_float = float(price_str)
-            
-            # Then apply additional rounding based on coin type
-            coin = self.info.name_to_coin.get(symbol, symbol)
-            if coin:
-                asset_idx = self.info.coin_to_asset.get(coin)
-                if asset_idx is not None:
-                    is_spot = asset_idx >= 10_000
-                    max_decimals = 8 if is_spot else 6
-                    return round(price_float, max_decimals)
-                
-            # Default to 6 decimal places if we can't determine
-            return round(price_float, 6)
-            
+            return self._round_price(price, self._get_price_decimals(symbol))
         except Exception as e:
             self.logger.warning(f"Error formatting price: {str(e)}. Using original price.")
             return price
     
+    def _get_price_decimals(self, symbol: str) -> int:
+        """Maximum price decimal places for a symbol: 8 for spot, 6 for perps or unknown coins"""
+        coin = self.info.name_to_coin.get(symbol, symbol)
+        if coin:
+            asset_idx = self.info.coin_to_asset.get(coin)
+            if asset_idx is not None:
+                is_spot = asset_idx >= 10_000
+                return 8 if is_spot else 6
+        return 6
+    
+    def _round_price(self, price: float, max_decimals: int) -> float:
+        """Round a price to 5 significant figures and at most max_decimals places"""
+        # Special handling for very large prices to avoid precision errors
+        if price > 100_000:
+            return round(price)
+        if price <= 0:
+            return round(price, max_decimals)
+        # 5 significant figures arithmetically, without formatting to a string and parsing it back
+        factor = 10.0 ** (4 - floor(log10(price)))
+        return round(round(price * factor) / factor, max_decimals)
+    
+    def _format_sizes(self, symbol: str, sizes: List[float]) -> List[float]:
+        """Format every size of a scaled order, looking up the symbol's precision once"""
+        try:
+            sz_decimals = self._get_sz_decimals(symbol)
+            return [round(size, sz_decimals) for size in sizes]
+        except Exception as e:
+            self.logger.warning(f"Error formatting size: {str(e)}. Using original size.")
+            return sizes
+    
+    def _format_prices(self, symbol: str, prices: List[float]) -> List[float]:
+        """Format every price of a scaled order, looking up the symbol's precision once"""
+        try:
+            max_decimals = self._get_price_decimals(symbol)
+            return [self._round_price(price, max_decimals) for price in prices]
+        except Exception as e:
+            self.logger.warning(f"Error formatting price: {str(e)}. Using original price.")
+            return prices
+    
+    def _validate_scaled_inputs(self, total_size: float, num_orders: int, start_price: float,
+                                end_price: float, skew: float) -> Optional[Dict[str, Any]]:
+        """
+        Check scaled order parameters
+        
+        Returns:
+            Error dict for the first invalid parameter, or None if they are all valid
+        """
+        if total_size <= 0:
+            return {"status": "error", "message": "Total size must be greater than 0"}
+        if num_orders <= 0:
+            return {"status": "error", "message": "Number of orders must be greater than 0"}
+        if start_price <= 0 or end_price <= 0:
+            return {"status": "error", "message": "Prices must be greater than 0"}
+        if skew < 0:
+            return {"status": "error", "message": "Skew must be non-negative"}
+        return None
+    
+    def _validate_formatted(self, sizes: List[float], prices: List[float],
+                            reduce_only: bool) -> Optional[Dict[str, Any]]:
+        """
+        Check every formatted order against the exchange's minimums before anything is sent
+        
+        Args:
+            sizes: Formatted order sizes
+            prices: Formatted order prices
+            reduce_only: Whether the orders are reduce-only (exempt from the minimum order value)
+            
+        Returns:
+            Error dict listing every offending order, or None if all of them are valid
+        """
+        min_value = 0.0 if reduce_only else MIN_ORDER_VALUE
+        bad_indices = [
+            i for i, (size, price) in enumerate(zip(sizes, prices))
+            if size <= 0 or price <= 0 or size * price < min_value
+        ]
+        if not bad_indices:
+            return None
+        return {
+            "status": "error",
+            "message": f"{len(bad_indices)} of {len(sizes)} orders are below the minimum order value "
+                       f"of ${MIN_ORDER_VALUE:g} or have a non-positive size or price",
+            "bad_indices": bad_indices,
+            "sizes": sizes,
+            "prices": prices
+        }
+    
+    def _get_order_book(self, symbol: str) -> Dict[str, Any]:
+        """Get the L2 book, through the connector's short-lived cache when available"""
+        if self.api_connector:
+            return self.api_connector.get_order_book(symbol)
+        return self.info.l2_snapshot(symbol)
+    
     def scaled_orders(self, symbol: str, is_buy: bool, total_size: float, num_orders: int,
                     start_price: float, end_price: float, skew: float = 0,
                     order_type: Dict = None, reduce_only: bool = False, check_market: bool = True) -> Dict[str, Any]:
@@ -170,18 +248,21 @@ class ScaledOrderExecutor:
         
         try:
             # Validate inputs
-            if total_size <= 0:
-                return {"status": "error", "message": "Total size must be greater than 0"}
-                
-            if num_orders <= 0:
-                return {"status": "error", "message": "Number of orders must be greater than 0"}
-                
-            if start_price <= 0 or end_price <= 0:
-                return {"status": "error", "message": "Prices must be greater than 0"}
-                
-            if skew < 0:
-                return {"status": "error", "message": "Skew must be non-negative"}
-                
+            error = self._validate_scaled_inputs(total_size, num_orders, start_price, end_price, skew)
+            if error is not None:
+                return error
+            
+            # Sizes don't depend on the market, so reject ladders whose orders round to nothing
+            # before fetching the book
+            formatted_sizes = self._format_sizes(
+                symbol, self._calculate_order_distribution(total_size, num_orders, skew)
+            )
+            if min(formatted_sizes) <= 0:
+                return {
+                    "status": "error",
+                    "message": f"Total size {total_size} is too small to split into {num_orders} orders for {symbol}"
+                }
+            
             # Validate/adjust price direction based on order side
             if is_buy and start_price < end_price:
                 self.logger.warning("For buy orders, start_price should be higher than end_price. Swapping values.")
@@ -198,7 +279,7 @@ class ScaledOrderExecutor:
             if check_market:
                 try:
                     # Get order book
-                    order_book = self.info.l2_snapshot(symbol)
+                    order_book = self._get_order_book(symbol)
                     
                     if order_book and "levels" in order_book and len(order_book["levels"]) >= 2:
                         bid_levels = order_book["levels"][0]
@@ -234,46 +315,33 @@ class ScaledOrderExecutor:
                 except Exception as e:
                     self.logger.warning(f"Error checking market data: {str(e)}. Continuing with provided prices.")
                     
-            # Calculate size and price for each order
-            order_sizes = self._calculate_order_distribution(total_size, num_orders, skew)
+            # Calculate and format the price for each order
             price_levels = self._calculate_price_levels(is_buy, num_orders, start_price, end_price)
+            formatted_prices = self._format_prices(symbol, price_levels)
             
-            # Format sizes and prices to correct precision
-            formatted_sizes = [self._format_size(symbol, s) for s in order_sizes]
-            formatted_prices = [self._format_price(symbol, p) for p in price_levels]
+            # Reject the whole ladder up front rather than letting the exchange fail orders one by one
+            error = self._validate_formatted(formatted_sizes, formatted_prices, reduce_only)
+            if error is not None:
+                self.logger.error(f"Scaled orders for {symbol} rejected: {error['message']}")
+                return error
             
             # Place orders
             self.logger.info(f"Placing {num_orders} {'buy' if is_buy else 'sell'} orders for {symbol} from {start_price} to {end_price} with total size {total_size}")
             
-            order_results = []
-            successful_orders = 0
-            
-            for i in range(num_orders):
-                try:
-                    result = self.exchange.order(
-                        symbol, 
-                        is_buy, 
-                        formatted_sizes[i], 
-                        formatted_prices[i], 
-                        order_type, 
-                        reduce_only
-                    )
-                    
-                    order_results.append(result)
-                    
-                    if result["status"] == "ok":
-                        successful_orders += 1
-                        self.logger.info(f"Order {i+1}/{num_orders} placed: {formatted_sizes[i]} @ {formatted_prices[i]}")
-                    else:
-                        self.logger.error(f"Order {i+1}/{num_orders} failed: {result}")
-                        
-                    # Small delay to avoid rate limiting
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    error_msg = f"Error placing order {i+1}/{num_orders}: {str(e)}"
-                    self.logger.error(error_msg)
-                    order_results.append({"status": "error", "message": error_msg})
+            # Submit every level in one signed request instead of one round-trip per order
+            batch_result = self.order_handler.batch_place([
+                {
+                    "symbol": symbol,
+                    "is_buy": is_buy,
+                    "size": formatted_sizes[i],
+                    "price": formatted_prices[i],
+                    "order_type": order_type,
+                    "reduce_only": reduce_only
+                }
+                for i in range(num_orders)
+            ])
+            order_results = batch_result.get("results", [batch_result])
+            successful_orders = batch_result.get("successful_orders", 0)
             
             return {
                 "status": "ok" if successful_orders > 0 else "error",
@@ -328,7 +396,7 @@ class ScaledOrderExecutor:
     
     def _set_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
         """
-        Set leverage for a symbol
+        Set leverage for a symbol unless it is already set to this value
         
         Args:
             symbol: Trading pair symbol
@@ -339,14 +407,9 @@ class ScaledOrderExecutor:
         """
         if not self.exchange:
             return {"status": "error", "message": "Not connected to exchange"}
-            
-        try:
-            self.logger.info(f"Setting {leverage}x leverage for {symbol}")
-            result = self.exchange.update_leverage(leverage, symbol)
-            return result
-        except Exception as e:
-            self.logger.error(f"Error setting leverage: {str(e)}")
-            return {"status": "error", "message": str(e)}
+        
+        # Go through the order handler so this shares its rate limiter and leverage cache
+        return self.order_handler._ensure_leverage(symbol, leverage)
     
     def market_aware_scaled_buy(self, symbol: str, total_size: float, num_orders: int, 
                                price_percent: float = 3.0, skew: float = 0) -> Dict[str, Any]:
@@ -368,7 +431,7 @@ class ScaledOrderExecutor:
             
         try:
             # Get order book
-            order_book = self.info.l2_snapshot(symbol)
+            order_book = self._get_order_book(symbol)
             
             if not order_book or "levels" not in order_book or len(order_book["levels"]) < 2:
                 return {"status": "error", "message": f"Could not fetch order book for {symbol}"}
@@ -417,7 +480,7 @@ class ScaledOrderExecutor:
             
         try:
             # Get order book
-            order_book = self.info.l2_snapshot(symbol)
+            order_book = self._get_order_book(symbol)
             
             if not order_book or "levels" not in order_book or len(order_book["levels"]) < 2:
                 return {"status": "error", "message": f"Could not fetch order book for {symbol}"}
@@ -1,5 +1,52 @@
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
+
+from api.constants import (
+    BATCH_ORDERS_PER_WEIGHT, EXCHANGE_ACTION_BURST, EXCHANGE_ACTIONS_PER_SECOND, LEVERAGE_CACHE_TTL
+)
+from core.utils import TokenBucket
+
+class OrderStatus:
+    """Outcome of a single order in an exchange order response"""
+    __slots__ = ("oid", "state", "error")
+    
+    def __init__(self, oid: Optional[int] = None, state: str = "error", error: Optional[str] = None):
+        self.oid = oid
+        self.state = state  # "open", "filled" or "error"
+        self.error = error
+
+def parse_order_status(status: Dict[str, Any]) -> OrderStatus:
+    """
+    Parse one entry of an order response's statuses list
+    
+    Args:
+        status: A status such as {"resting": {"oid": ...}}, {"filled": {...}} or {"error": "..."}
+        
+    Returns:
+        OrderStatus for the entry
+    """
+    resting = status.get("resting")
+    if resting is not None:
+        return OrderStatus(resting["oid"], "open")
+    filled = status.get("filled")
+    if filled is not None:
+        return OrderStatus(filled["oid"], "filled")
+    return OrderStatus(error=status.get("error", f"Unexpected order status: {status}"))
+
+def first_order_status(result: Dict[str, Any]) -> OrderStatus:
+    """
+    Parse the status of the (first) order in a single order result
+    
+    Args:
+        result: Result of a limit or market order, or of one batch_place entry
+        
+    Returns:
+        OrderStatus for the order, or an error status if the request itself failed
+    """
+    if result.get("status") != "ok":
+        return OrderStatus(error=result.get("message") or str(result.get("response", result)))
+    return parse_order_status(result["response"]["data"]["statuses"][0])
 
 class SimpleOrderExecutor:
     """Handles basic order execution for Elysium Trading Platform"""
@@ -8,11 +55,16 @@ class SimpleOrderExecutor:
         self.exchange = exchange
         self.info = info
         self.logger = logging.getLogger(__name__)
+        # Every exchange action (orders, cancels, leverage) draws from this bucket
+        self.rate_limiter = TokenBucket(EXCHANGE_ACTION_BURST, EXCHANGE_ACTIONS_PER_SECOND)
+        # Leverage last set successfully per symbol, so grid and scaled starts don't re-send an unchanged value
+        self._leverage: Dict[str, tuple] = {}  # symbol -> (timestamp, leverage)
     
     def set_exchange(self, exchange, info):
         """Set the exchange and info objects"""
         self.exchange = exchange
         self.info = info
+        self._leverage.clear()
     
     # ============================= Spot Trading =============================
     
@@ -33,6 +85,7 @@ class SimpleOrderExecutor:
             
         try:
             self.logger.info(f"Executing market buy: {size} {symbol}")
+            self.rate_limiter.acquire()
             result = self.exchange.market_open(symbol, True, size, None, slippage)
             
             if result["status"] == "ok":
@@ -64,6 +117,7 @@ class SimpleOrderExecutor:
             
         try:
             self.logger.info(f"Executing market sell: {size} {symbol}")
+            self.rate_limiter.acquire()
             result = self.exchange.market_open(symbol, False, size, None, slippage)
             
             if result["status"] == "ok":
@@ -95,13 +149,12 @@ class SimpleOrderExecutor:
             
         try:
             self.logger.info(f"Placing limit buy: {size} {symbol} @ {price}")
+            self.rate_limiter.acquire()
             result = self.exchange.order(symbol, True, size, price, {"limit": {"tif": "Gtc"}})
             
-            if result["status"] == "ok":
-                status = result["response"]["data"]["statuses"][0]
-                if "resting" in status:
-                    oid = status["resting"]["oid"]
-                    self.logger.info(f"Limit buy placed: order ID {oid}")
+            status = first_order_status(result)
+            if status.state == "open":
+                self.logger.info(f"Limit buy placed: order ID {status.oid}")
             return result
         except Exception as e:
             self.logger.error(f"Error in limit buy: {str(e)}")
@@ -124,13 +177,12 @@ class SimpleOrderExecutor:
             
         try:
             self.logger.info(f"Placing limit sell: {size} {symbol} @ {price}")
+            self.rate_limiter.acquire()
             result = self.exchange.order(symbol, False, size, price, {"limit": {"tif": "Gtc"}})
             
-            if result["status"] == "ok":
-                status = result["response"]["data"]["statuses"][0]
-                if "resting" in status:
-                    oid = status["resting"]["oid"]
-                    self.logger.info(f"Limit sell placed: order ID {oid}")
+            status = first_order_status(result)
+            if status.state == "open":
+                self.logger.info(f"Limit sell placed: order ID {status.oid}")
             return result
         except Exception as e:
             self.logger.error(f"Error in limit sell: {str(e)}")
@@ -154,12 +206,35 @@ class SimpleOrderExecutor:
             
         try:
             self.logger.info(f"Setting {leverage}x leverage for {symbol}")
+            self.rate_limiter.acquire()
             result = self.exchange.update_leverage(leverage, symbol)
+            if result.get("status") == "ok":
+                self._leverage[symbol] = (time.monotonic(), leverage)
+            else:
+                self._leverage.pop(symbol, None)
             return result
         except Exception as e:
             self.logger.error(f"Error setting leverage: {str(e)}")
             return {"status": "error", "message": str(e)}
     
+    def _ensure_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
+        """
+        Set leverage for a symbol unless it was set to this value within LEVERAGE_CACHE_TTL seconds
+        
+        Leverage can be changed outside this process, so single orders call _set_leverage instead.
+        
+        Args:
+            symbol: Trading pair symbol
+            leverage: Leverage multiplier
+            
+        Returns:
+            Response dictionary (a plain ok status when nothing needed sending)
+        """
+        cached = self._leverage.get(symbol)
+        if cached is not None and cached[1] == leverage and time.monotonic() - cached[0] < LEVERAGE_CACHE_TTL:
+            return {"status": "ok"}
+        return self._set_leverage(symbol, leverage)
+    
     def perp_market_buy(self, symbol: str, size: float, leverage: int = 1, slippage: float = 0.05) -> Dict[str, Any]:
         """
         Execute a perpetual market buy order
@@ -181,6 +256,7 @@ class SimpleOrderExecutor:
             self._set_leverage(symbol, leverage)
             
             self.logger.info(f"Executing perp market buy: {size} {symbol} with {leverage}x leverage")
+            self.rate_limiter.acquire()
             result = self.exchange.market_open(symbol, True, size, None, slippage)
             
             if result["status"] == "ok":
@@ -216,6 +292,7 @@ class SimpleOrderExecutor:
             self._set_leverage(symbol, leverage)
             
             self.logger.info(f"Executing perp market sell: {size} {symbol} with {leverage}x leverage")
+            self.rate_limiter.acquire()
             result = self.exchange.market_open(symbol, False, size, None, slippage)
             
             if result["status"] == "ok":
@@ -251,13 +328,12 @@ class SimpleOrderExecutor:
             self._set_leverage(symbol, leverage)
             
             self.logger.info(f"Placing perp limit buy: {size} {symbol} @ {price} with {leverage}x leverage")
+            self.rate_limiter.acquire()
             result = self.exchange.order(symbol, True, size, price, {"limit": {"tif": "Gtc"}})
             
-            if result["status"] == "ok":
-                status = result["response"]["data"]["statuses"][0]
-                if "resting" in status:
-                    oid = status["resting"]["oid"]
-                    self.logger.info(f"Perp limit buy placed: order ID {oid}")
+            status = first_order_status(result)
+            if status.state == "open":
+                self.logger.info(f"Perp limit buy placed: order ID {status.oid}")
             return result
         except Exception as e:
             self.logger.error(f"Error in perp limit buy: {str(e)}")
@@ -284,13 +360,12 @@ class SimpleOrderExecutor:
             self._set_leverage(symbol, leverage)
             
             self.logger.info(f"Placing perp limit sell: {size} {symbol} @ {price} with {leverage}x leverage")
+            self.rate_limiter.acquire()
             result = self.exchange.order(symbol, False, size, price, {"limit": {"tif": "Gtc"}})
             
-            if result["status"] == "ok":
-                status = result["response"]["data"]["statuses"][0]
-                if "resting" in status:
-                    oid = status["resting"]["oid"]
-                    self.logger.info(f"Perp limit sell placed: order ID {oid}")
+            status = first_order_status(result)
+            if status.state == "open":
+                self.logger.info(f"Perp limit sell placed: order ID {status.oid}")
             return result
         except Exception as e:
             self.logger.error(f"Error in perp limit sell: {str(e)}")
@@ -312,6 +387,7 @@ class SimpleOrderExecutor:
             
         try:
             self.logger.info(f"Closing position for {symbol}")
+            self.rate_limiter.acquire()
             result = self.exchange.market_close(symbol, None, None, slippage)
             
             if result["status"] == "ok":
@@ -326,6 +402,75 @@ class SimpleOrderExecutor:
             self.logger.error(f"Error closing position: {str(e)}")
             return {"status": "error", "message": str(e)}
     
+    # ============================= Batch Orders =============================
+    
+    def batch_place(self, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Place several limit orders in a single signed exchange request
+        
+        Args:
+            orders: Order dicts with symbol, is_buy, size and price, plus optional
+                order_type (defaults to GTC limit) and reduce_only (defaults to False)
+            
+        Returns:
+            Dict with the overall status, success counts and one result per order
+            (in the same shape as a single order response)
+        """
+        if not self.exchange:
+            return {"status": "error", "message": "Not connected to exchange"}
+        
+        if not orders:
+            return {"status": "error", "message": "No orders to place"}
+        
+        num_orders = len(orders)
+        try:
+            order_requests = [
+                {
+                    "coin": order["symbol"],
+                    "is_buy": order["is_buy"],
+                    "sz": order["size"],
+                    "limit_px": order["price"],
+                    "order_type": order.get("order_type") or {"limit": {"tif": "Gtc"}},
+                    "reduce_only": order.get("reduce_only", False)
+                }
+                for order in orders
+            ]
+            
+            self.logger.info(f"Placing batch of {num_orders} orders")
+            self.rate_limiter.acquire(1 + num_orders // BATCH_ORDERS_PER_WEIGHT)
+            response = self.exchange.bulk_orders(order_requests)
+            
+            if response.get("status") == "ok":
+                statuses = response["response"]["data"]["statuses"]
+            else:
+                # The whole batch was rejected; report the same error for every order
+                statuses = [{"error": str(response.get("response", response))}] * num_orders
+            
+            order_results = []
+            successful_orders = 0
+            for i, status in enumerate(statuses):
+                if "error" in status:
+                    self.logger.error(f"Order {i+1}/{num_orders} failed: {status['error']}")
+                    order_results.append({"status": "error", "message": status["error"]})
+                else:
+                    successful_orders += 1
+                    order_results.append({
+                        "status": "ok",
+                        "response": {"type": "order", "data": {"statuses": [status]}}
+                    })
+            
+            self.logger.info(f"Batch placed {successful_orders}/{num_orders} orders")
+            return {
+                "status": "ok" if successful_orders > 0 else "error",
+                "message": f"Successfully placed {successful_orders}/{num_orders} orders",
+                "successful_orders": successful_orders,
+                "total_orders": num_orders,
+                "results": order_results
+            }
+        except Exception as e:
+            self.logger.error(f"Error placing batch orders: {str(e)}")
+            return {"status": "error", "message": str(e)}
+    
     # ============================= Order Management =============================
     
     def cancel_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
@@ -344,7 +489,9 @@ class SimpleOrderExecutor:
             
         try:
             self.logger.info(f"Cancelling order {order_id} for {symbol}")
-            result = self.exchange.cancel(symbol, order_id)
+            self.rate_limiter.acquire()
+            # A one-element bulk cancel, the same request every other cancel path sends
+            result = self.exchange.bulk_cancel([{"coin": symbol, "oid": order_id}])
             
             if result["status"] == "ok":
                 self.logger.info(f"Order {order_id} cancelled successfully")
@@ -355,6 +502,105 @@ class SimpleOrderExecutor:
             self.logger.error(f"Error cancelling order: {str(e)}")
             return {"status": "error", "message": str(e)}
     
+    def batch_cancel(self, symbol: str, order_ids: List[int]) -> Dict[str, Any]:
+        """
+        Cancel several orders for one symbol in a single signed exchange request
+        
+        Args:
+            symbol: Trading pair symbol
+            order_ids: Order IDs to cancel
+            
+        Returns:
+            Dict with the overall status, cancel counts and one result per order ID
+            (in the same order as order_ids)
+        """
+        if not self.exchange:
+            return {"status": "error", "message": "Not connected to exchange"}
+        
+        if not order_ids:
+            return {"status": "error", "message": "No orders to cancel"}
+        
+        num_orders = len(order_ids)
+        try:
+            self.logger.info(f"Cancelling batch of {num_orders} orders for {symbol}")
+            order_results = self._bulk_cancel([{"coin": symbol, "oid": oid} for oid in order_ids])
+            cancelled = sum(1 for order_result in order_results if order_result["status"] == "ok")
+            
+            self.logger.info(f"Batch cancelled {cancelled}/{num_orders} orders for {symbol}")
+            return {
+                "status": "ok" if cancelled > 0 else "error",
+                "message": f"Successfully cancelled {cancelled}/{num_orders} orders",
+                "cancelled_orders": cancelled,
+                "total_orders": num_orders,
+                "results": order_results
+            }
+        except Exception as e:
+            self.logger.error(f"Error cancelling batch orders: {str(e)}")
+            return {"status": "error", "message": str(e)}
+    
+    def _bulk_cancel(self, cancels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Cancel orders, possibly for several symbols, in a single signed exchange request
+        
+        Args:
+            cancels: {"coin", "oid"} dicts for the orders to cancel
+            
+        Returns:
+            One {"status", "symbol", "order_id"[, "message"]} result per cancel, in the same order
+            
+        Raises:
+            ValueError: If the exchange returned a different number of statuses than orders sent
+        """
+        num_orders = len(cancels)
+        self.rate_limiter.acquire(1 + num_orders // BATCH_ORDERS_PER_WEIGHT)
+        response = self.exchange.bulk_cancel(cancels)
+        
+        if response.get("status") == "ok":
+            statuses = response["response"]["data"]["statuses"]
+            if len(statuses) != num_orders:
+                raise ValueError(f"Exchange returned {len(statuses)} cancel statuses for {num_orders} orders")
+        else:
+            # The whole batch was rejected; report the same error for every order
+            statuses = [{"error": str(response.get("response", response))}] * num_orders
+        
+        order_results = []
+        for cancel, status in zip(cancels, statuses):
+            if isinstance(status, dict) and "error" in status:
+                self.logger.error(f"Failed to cancel order {cancel['oid']}: {status['error']}")
+                order_results.append({
+                    "status": "error", "symbol": cancel["coin"], "order_id": cancel["oid"], "message": status["error"]
+                })
+            else:
+                order_results.append({"status": "ok", "symbol": cancel["coin"], "order_id": cancel["oid"]})
+        return order_results
+    
+    def _cancel_each(self, cancels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Cancel orders one request at a time, so a bad order can't stop the others from being cancelled
+        
+        Args:
+            cancels: {"coin", "oid"} dicts for the orders to cancel
+            
+        Returns:
+            One {"status", "symbol", "order_id"[, "message"]} result per cancel, in the same order
+        """
+        order_results = []
+        for cancel in cancels:
+            result = self.cancel_order(cancel["coin"], cancel["oid"])
+            if result.get("status") != "ok":
+                error = result.get("message") or str(result.get("response", result))
+            else:
+                status = result["response"]["data"]["statuses"][0]
+                error = status["error"] if isinstance(status, dict) and "error" in status else None
+            
+            if error is None:
+                order_results.append({"status": "ok", "symbol": cancel["coin"], "order_id": cancel["oid"]})
+            else:
+                order_results.append({
+                    "status": "error", "symbol": cancel["coin"], "order_id": cancel["oid"], "message": error
+                })
+        return order_results
+    
     def cancel_all_orders(self, symbol: Optional[str] = None) -> Dict[str, Any]:
         """
         Cancel all open orders, optionally filtered by symbol
@@ -372,19 +618,26 @@ class SimpleOrderExecutor:
             symbol_text = f" for {symbol}" if symbol else ""
             self.logger.info(f"Cancelling all orders{symbol_text}")
             open_orders = self.info.open_orders(self.wallet_address)
+            cancels = [
+                {"coin": order["coin"], "oid": order["oid"]}
+                for order in open_orders
+                if symbol is None or order["coin"] == symbol
+            ]
+            
+            # Every matching order, across all symbols, goes out in one signed request
+            details = []
+            if cancels:
+                try:
+                    details = self._bulk_cancel(cancels)
+                except Exception as e:
+                    # e.g. a coin the Exchange has no asset id for; fall back so the rest still get cancelled
+                    self.logger.warning(f"Bulk cancel failed ({str(e)}), cancelling orders one by one")
+                    details = self._cancel_each(cancels)
+            cancelled = sum(1 for detail in details if detail["status"] == "ok")
+            results = {"cancelled": cancelled, "failed": len(details) - cancelled, "details": details}
             
-            results = {"cancelled": 0, "failed": 0, "details": []}
-            for order in open_orders:
-                if symbol is None or order["coin"] == symbol:
-                    result = self.cancel_order(order["coin"], order["oid"])
-                    if result["status"] == "ok":
-                        results["cancelled"] += 1
-                    else:
-                        results["failed"] += 1
-                    results["details"].append(result)
-                    
             self.logger.info(f"Cancelled {results['cancelled']} orders, {results['failed']} failed")
-            return {"status": "ok", "data": results}
+            return {"status": "ok", "cancelled_orders": cancelled, "data": results}
         except Exception as e:
             self.logger.error(f"Error cancelling all orders: {str(e)}")
             return {"status": "error", "message": str(e)}
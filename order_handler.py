@@ -1,10 +1,11 @@
 import logging
 from typing import Dict, List, Any, Optional
 
+from core.utils import reference_price
 from order_execution.simple_orders import SimpleOrderExecutor
 from order_execution.scaled_orders import ScaledOrderExecutor
 from order_execution.twap_orders import TwapOrderExecutor
-from order_execution.grid_trading import GridTrading
+from order_execution.grid_trading import GRID_HISTORY_FILE, GridTrading
 
 class OrderHandler:
     """
@@ -12,18 +13,35 @@ class OrderHandler:
     for the Elysium Trading Platform.
     """
     
-    def __init__(self, exchange=None, info=None):
+    def __init__(self, exchange=None, info=None, grid_history_file: str = GRID_HISTORY_FILE):
         self.exchange = exchange
         self.info = info
-        self.wallet_address = None
+        self._wallet_address = None
+        self._ready = False  # Exchange, info and wallet address are all set
         self.api_connector = None
         self.logger = logging.getLogger(__name__)
         
         # Initialize order executors
         self.simple_executor = SimpleOrderExecutor(exchange, info)
         self.scaled_executor = ScaledOrderExecutor(exchange, info)
+        self.scaled_executor.order_handler = self
         self.twap_executor = TwapOrderExecutor(exchange, info)
-        self.grid_trading = GridTrading(self)
+        self.grid_trading = GridTrading(self, history_file=grid_history_file)
+        self._update_ready()
+    
+    @property
+    def wallet_address(self) -> Optional[str]:
+        """Wallet address orders are placed for"""
+        return self._wallet_address
+    
+    @wallet_address.setter
+    def wallet_address(self, value: Optional[str]) -> None:
+        self._wallet_address = value
+        self._update_ready()
+    
+    def _update_ready(self) -> None:
+        """Recompute whether the handler is fully configured to place orders"""
+        self._ready = bool(self.exchange and self.info and self._wallet_address)
     
     def set_exchange(self, exchange, info, api_connector=None):
         """
@@ -43,6 +61,10 @@ class OrderHandler:
         self.scaled_executor.set_exchange(exchange, info, api_connector)
         self.twap_executor.set_exchange(exchange, info, api_connector)
         self.twap_executor.order_handler = self
+        self._update_ready()
+        
+        # Running grids follow the connection to its new fill stream
+        self.grid_trading.refresh_fill_stream()
     
     # ============================= Simple Order Methods =============================
     
@@ -82,10 +104,18 @@ class OrderHandler:
         """Close an entire position for a symbol"""
         return self.simple_executor.close_position(symbol, slippage)
     
+    def batch_place(self, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Place several limit orders in a single exchange request"""
+        return self.simple_executor.batch_place(orders)
+    
     def cancel_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
         """Cancel a specific order"""
         return self.simple_executor.cancel_order(symbol, order_id)
     
+    def batch_cancel(self, symbol: str, order_ids: List[int]) -> Dict[str, Any]:
+        """Cancel several orders for one symbol in a single exchange request"""
+        return self.simple_executor.batch_cancel(symbol, order_ids)
+    
     def cancel_all_orders(self, symbol: Optional[str] = None) -> Dict[str, Any]:
         """Cancel all open orders, optionally filtered by symbol"""
         self.simple_executor.wallet_address = self.wallet_address
@@ -100,6 +130,10 @@ class OrderHandler:
         """Set leverage for a symbol"""
         return self.simple_executor._set_leverage(symbol, leverage)
     
+    def _ensure_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
+        """Set leverage for a symbol unless it is already set to this value"""
+        return self.simple_executor._ensure_leverage(symbol, leverage)
+    
     # ============================= Scaled Order Methods =============================
     
     def scaled_orders(self, symbol: str, is_buy: bool, total_size: float, num_orders: int,
@@ -177,11 +211,21 @@ class OrderHandler:
     def create_grid(self, symbol: str, upper_price: float, lower_price: float, 
                    num_grids: int, total_investment: float, is_perp: bool = False, 
                    leverage: int = 1, take_profit: Optional[float] = None,
-                   stop_loss: Optional[float] = None) -> str:
+                   stop_loss: Optional[float] = None, spacing: str = "linear") -> str:
         """Create a new grid trading strategy"""
         return self.grid_trading.create_grid(
             symbol, upper_price, lower_price, num_grids, total_investment,
-            is_perp, leverage, take_profit, stop_loss
+            is_perp, leverage, take_profit, stop_loss, spacing
+        )
+    
+    def launch_grid(self, symbol: str, upper_price: float, lower_price: float, 
+                   num_grids: int, total_investment: float, is_perp: bool = False, 
+                   leverage: int = 1, take_profit: Optional[float] = None,
+                   stop_loss: Optional[float] = None, spacing: str = "linear") -> Dict[str, Any]:
+        """Create a grid trading strategy and start it in one step"""
+        return self.grid_trading.launch_grid(
+            symbol, upper_price, lower_price, num_grids, total_investment,
+            is_perp, leverage, take_profit, stop_loss, spacing
         )
     
     def start_grid(self, grid_id: str) -> Dict[str, Any]:
@@ -196,7 +240,16 @@ class OrderHandler:
         """Get the status of a grid trading strategy"""
         return self.grid_trading.get_grid_status(grid_id)
     
-    def list_grids(self) -> Dict[str, List[Dict[str, Any]]]:
+    def get_grid_summary(self, grid_id: str) -> Dict[str, Any]:
+        """Get the headline figures of a grid trading strategy"""
+        return self.grid_trading.get_grid_summary(grid_id)
+    
+    def get_grid_orders(self, grid_id: str, offset: int = 0, limit: int = 50,
+                        filled: bool = False) -> Dict[str, Any]:
+        """Get one page of a grid trading strategy's orders"""
+        return self.grid_trading.get_grid_orders(grid_id, offset, limit, filled)
+    
+    def list_grids(self) -> Dict[str, Any]:
         """List all grid trading strategies"""
         return self.grid_trading.list_grids()
     
@@ -239,7 +292,7 @@ class OrderHandler:
         
         try:
             # Try to get market data
-            market_data = self.api_connector.get_market_data(symbol)
+            market_data = self.api_connector.get_market_data(symbol, include_order_book=True)
             
             if "error" in market_data:
                 return {
@@ -255,14 +308,7 @@ class OrderHandler:
                 }
             
             # If we have price data, consider it a success
-            price = market_data.get("mid_price")
-            if not price:
-                if market_data.get("best_bid") and market_data.get("best_ask"):
-                    price = (market_data["best_bid"] + market_data["best_ask"]) / 2
-                elif market_data.get("best_bid"):
-                    price = market_data["best_bid"]
-                elif market_data.get("best_ask"):
-                    price = market_data["best_ask"]
+            price, _ = reference_price(market_data)
             
             return {
                 "success": True,
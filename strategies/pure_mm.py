@@ -254,15 +254,12 @@ class PureMarketMaking(TradingStrategy):
         try:
             # Try to get from exchange metadata
             if self.api_connector and self.api_connector.info:
-                meta = self.api_connector.info.meta()
-                
-                for asset_info in meta.get("universe", []):
-                    if asset_info.get("name") == self.symbol:
-                        if "tickSize" in asset_info:
-                            return float(asset_info["tickSize"])
+                asset_info = self.api_connector.get_asset_info(self.symbol)
+                if asset_info and "tickSize" in asset_info:
+                    return float(asset_info["tickSize"])
             
             # Fallback to checking from market data
-            market_data = self.api_connector.get_market_data(self.symbol)
+            market_data = self.api_connector.get_market_data(self.symbol, include_order_book=True)
             if "best_bid" in market_data:
                 # Try to infer tick size from price
                 bid_str = str(market_data["best_bid"])
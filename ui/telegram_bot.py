@@ -764,7 +764,7 @@ class ElysiumTelegramBot:
             
             update.message.reply_text(f"🔄 Fetching price for {symbol}...")
             
-            market_data = self.api_connector.get_market_data(symbol)
+            market_data = self.api_connector.get_market_data(symbol, include_order_book=True)
             
             if "error" in market_data:
                 update.message.reply_text(f"❌ Error: {market_data['error']}")
@@ -266,20 +266,24 @@ class ElysiumTerminalUI(cmd.Cmd):
         print(f"\n{StatusIcons.LOADING} Fetching balance information...")
         balances = self.api_connector.get_balances()
         
+        # Build the report first and print it in one go
+        lines = ["\n=== Account Balances ==="]
+        
         # Display spot balances
-        print("\n=== Account Balances ===")
         if balances.get("spot"):
-            print("\nSpot Balances:")
+            lines.append("\nSpot Balances:")
             for balance in balances["spot"]:
                 if float(balance.get("total", 0)) > 0:
-                    print(f"• {balance['asset']}: {balance['available']} available, {balance['total']} total")
+                    lines.append(f"• {balance['asset']}: {balance['available']} available, {balance['total']} total")
         
         # Display perpetual balances
         if balances.get("perp"):
-            print("\nPerpetual Account:")
-            print(f"• Account Value: ${balances['perp']['account_value']}")
-            print(f"• Margin Used: ${balances['perp']['margin_used']}")
-            print(f"• Position Value: ${balances['perp']['position_value']}")
+            lines.append("\nPerpetual Account:")
+            lines.append(f"• Account Value: ${balances['perp']['account_value']}")
+            lines.append(f"• Margin Used: ${balances['perp']['margin_used']}")
+            lines.append(f"• Position Value: ${balances['perp']['position_value']}")
+        
+        print("\n".join(lines))
     
     def do_positions(self, arg):
         """Show open positions"""
@@ -293,16 +297,17 @@ class ElysiumTerminalUI(cmd.Cmd):
             print("No open positions")
             return
         
-        print("\n=== Open Positions ===")
+        lines = ["\n=== Open Positions ==="]
         for pos in positions:
             symbol = pos.get("symbol", "")
             size = pos.get("size", 0)
             side = "Long" if size > 0 else "Short"
-            print(f"\n{symbol} ({side}):")
-            print(f"• Size: {abs(size)}")
-            print(f"• Entry Price: {pos.get('entry_price', 0)}")
-            print(f"• Mark Price: {pos.get('mark_price', 0)}")
-            print(f"• Unrealized PnL: {pos.get('unrealized_pnl', 0)}")
+            lines.append(f"\n{symbol} ({side}):")
+            lines.append(f"• Size: {abs(size)}")
+            lines.append(f"• Entry Price: {pos.get('entry_price', 0)}")
+            lines.append(f"• Mark Price: {pos.get('mark_price', 0)}")
+            lines.append(f"• Unrealized PnL: {pos.get('unrealized_pnl', 0)}")
+        print("\n".join(lines))
     
     def do_orders(self, arg):
         """Show open orders"""
@@ -321,13 +326,14 @@ class ElysiumTerminalUI(cmd.Cmd):
             print("No open orders")
             return
         
-        print("\n=== Open Orders ===")
+        lines = ["\n=== Open Orders ==="]
         for order in orders:
-            print(f"\n{order.get('coin', '')}")
-            print(f"• Side: {'Buy' if order.get('side', '') == 'B' else 'Sell'}")
-            print(f"• Size: {float(order.get('sz', 0))}")
-            print(f"• Price: {float(order.get('limitPx', 0))}")
-            print(f"• Order ID: {order.get('oid', 0)}")
+            lines.append(f"\n{order.get('coin', '')}")
+            lines.append(f"• Side: {'Buy' if order.get('side', '') == 'B' else 'Sell'}")
+            lines.append(f"• Size: {float(order.get('sz', 0))}")
+            lines.append(f"• Price: {float(order.get('limitPx', 0))}")
+            lines.append(f"• Order ID: {order.get('oid', 0)}")
+        print("\n".join(lines))
     
     # ============================= Strategy Commands =============================
     